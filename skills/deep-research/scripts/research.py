@@ -16,9 +16,15 @@ import argparse
 import hashlib
 import json
 import mimetypes
+import mmap
 import os
+import re
 import sys
+import threading
 import time
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from pathlib import Path
 
 from google import genai
@@ -33,11 +39,31 @@ from rich.text import Text
 
 console = Console(stderr=True)
 
+
+def _env_int(name: str, default: int) -> int:
+    """Integer from the environment, falling back to *default* if unset or malformed."""
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
 DEFAULT_AGENT = os.environ.get(
     "GEMINI_DEEP_RESEARCH_AGENT",
     "deep-research-pro-preview-12-2025",
 )
 
+# Maximum files uploading at once (overridable with --context-concurrency).
+DEFAULT_UPLOAD_CONCURRENCY = _env_int("GEMINI_DEEP_RESEARCH_UPLOAD_CONCURRENCY", 8)
+UPLOAD_POLL_INTERVAL = 2.0
+# Files hashed at once for smart-sync.  hashlib releases the GIL while
+# digesting large buffers, so threads use every core.
+DEFAULT_HASH_WORKERS = _env_int("GEMINI_DEEP_RESEARCH_HASH_WORKERS", 0) or min(
+    32, os.cpu_count() or 4
+)
+HASH_BUFFER_SIZE = 1 << 20
+# Files at least this large are hashed straight from an mmap.
+HASH_MMAP_THRESHOLD = 16 << 20
+
 # ---------------------------------------------------------------------------
 # MIME type maps (duplicated from upload.py -- PEP 723 standalone scripts)
 # ---------------------------------------------------------------------------
@@ -113,6 +139,13 @@ BINARY_EXTENSIONS: set[str] = {
     ".ttf", ".otf", ".woff", ".woff2", ".eot",
 }
 
+# Directories never descended into: VCS metadata and dependency/tool caches.
+IGNORED_DIRS: set[str] = {
+    ".git", ".hg", ".svn",
+    "node_modules", "__pycache__", ".venv", "venv",
+    ".tox", ".nox", ".mypy_cache", ".pytest_cache", ".ruff_cache",
+}
+
 # ---------------------------------------------------------------------------
 # Pricing estimates (heuristic -- Gemini API does not return token counts)
 # ---------------------------------------------------------------------------
@@ -152,28 +185,261 @@ def _resolve_mime(filepath: Path) -> str | None:
 
 
 def _file_hash(filepath: Path) -> str:
-    """Compute SHA-256 hash of a file for smart-sync."""
+    """Compute SHA-256 hash of a file for smart-sync.
+
+    Large files are digested from an mmap in one call, the rest through a
+    reused 1 MiB buffer, so hashing runs at I/O speed rather than paying a
+    Python round trip per 8 KB chunk.
+    """
     h = hashlib.sha256()
     with open(filepath, "rb") as f:
-        for chunk in iter(lambda: f.read(8192), b""):
-            h.update(chunk)
+        if os.fstat(f.fileno()).st_size >= HASH_MMAP_THRESHOLD:
+            try:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    h.update(mm)
+                return h.hexdigest()
+            except (OSError, ValueError):
+                # Not mappable (special filesystem, file shrank): read it instead.
+                h = hashlib.sha256()
+                f.seek(0)
+        buf = bytearray(HASH_BUFFER_SIZE)
+        view = memoryview(buf)
+        while n := f.readinto(buf):
+            h.update(view[:n])
     return h.hexdigest()
 
 
+# Stat fingerprints for the hash cache (duplicated from upload.py -- PEP 723
+# standalone scripts).  Files modified this recently may still change within
+# the same mtime tick, so their fingerprint is not trusted on the next run
+# (cf. git's "racy clean").
+RACY_WINDOW_NS = 2_000_000_000
+
+
+def _stat_fingerprint(st: os.stat_result) -> dict:
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "ino": st.st_ino}
+
+
+def _cache_entry_hash(entry: dict | str | None) -> str | None:
+    """SHA-256 recorded in a hash-cache entry (older caches store the bare hash)."""
+    if isinstance(entry, str):
+        return entry
+    return entry.get("sha256") if entry else None
+
+
+def _cached_file_hash(filepath: Path, entry: dict | str | None, verify: bool = False) -> dict:
+    """Return the hash-cache entry for *filepath*, rehashing only if needed.
+
+    The file is read only when its (size, mtime_ns, inode) fingerprint
+    differs from *entry*, the entry predates fingerprints or was racy, or
+    *verify* forces a full rehash.
+    """
+    st = filepath.stat()
+    fingerprint = _stat_fingerprint(st)
+    if (
+        not verify
+        and isinstance(entry, dict)
+        and not entry.get("racy")
+        and all(entry.get(k) == v for k, v in fingerprint.items())
+    ):
+        return entry
+    new_entry = {"sha256": _file_hash(filepath), **fingerprint}
+    if time.time_ns() - st.st_mtime_ns < RACY_WINDOW_NS:
+        new_entry["racy"] = True
+    return new_entry
+
+
+# Parallel hashing stage (duplicated from upload.py -- PEP 723 standalone scripts).
+def _hash_files(
+    files: Iterable[Path],
+    hash_cache: dict,
+    verify: bool = False,
+    workers: int = DEFAULT_HASH_WORKERS,
+    stats: dict | None = None,
+) -> Iterator[tuple[Path, dict | None, Exception | None]]:
+    """Hash *files* on a thread pool, yielding ``(path, entry, error)`` in order.
+
+    Runs :func:`_cached_file_hash` against ``hash_cache[str(path)]`` for up to
+    *workers* files at once, reading ahead a bounded window so *files* may
+    be a lazy iterator.  A file that cannot be read yields its error instead
+    of an entry.  Bytes actually read (stat fast-path hits are free) and the
+    time any hash was in flight are accumulated into *stats* for
+    :func:`_hash_throughput` -- time spent waiting on the consumer (e.g. for
+    an upload slot) does not count against throughput.
+    """
+    workers = max(1, workers)
+    if stats is None:
+        stats = {}
+    for key in ("files", "bytes", "seconds"):
+        stats.setdefault(key, 0)
+    lock = threading.Lock()
+    active = 0
+    busy_since = 0.0
+
+    def work(filepath: Path):
+        nonlocal active, busy_since
+        with lock:
+            if not active:
+                busy_since = time.monotonic()
+            active += 1
+        try:
+            cached = hash_cache.get(str(filepath))
+            entry = _cached_file_hash(filepath, cached, verify)
+        finally:
+            with lock:
+                active -= 1
+                if not active:
+                    stats["seconds"] += time.monotonic() - busy_since
+        return entry, entry is not cached
+
+    pending: deque[tuple[Path, Future]] = deque()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+
+        def drain_one() -> tuple[Path, dict | None, Exception | None]:
+            filepath, future = pending.popleft()
+            try:
+                entry, hashed = future.result()
+            except Exception as exc:
+                return filepath, None, exc
+            if hashed:
+                stats["files"] += 1
+                stats["bytes"] += entry["size"]
+            return filepath, entry, None
+
+        for filepath in files:
+            pending.append((filepath, pool.submit(work, filepath)))
+            if len(pending) >= 4 * workers:
+                yield drain_one()
+        while pending:
+            yield drain_one()
+
+
+def _hash_throughput(stats: dict) -> str:
+    """One-line summary of a :func:`_hash_files` run, e.g. for the console."""
+    mb = stats.get("bytes", 0) / 1e6
+    seconds = stats.get("seconds", 0)
+    rate = mb / seconds if seconds else 0.0
+    return f"Hashed {stats.get('files', 0)} file(s), {mb:.1f} MB at {rate:.1f} MB/s"
+
+
+# Tree walker (duplicated from upload.py -- PEP 723 standalone scripts).
+def _ignore_rule(line: str) -> tuple[re.Pattern, bool, bool] | None:
+    """Compile one ``.gitignore`` line into ``(regex, negate, dir_only)``.
+
+    Supports the common subset of gitignore syntax: ``#`` comments, ``!``
+    negation, trailing ``/`` for directories only, leading or inner ``/``
+    anchoring the pattern to its base directory, and ``*``, ``?``, ``[...]``
+    and ``**`` wildcards.
+    """
+    line = re.sub(r"(?<!\\)\s+$", "", line)
+    if not line or line.startswith("#"):
+        return None
+    negate = line.startswith("!")
+    if negate:
+        line = line[1:]
+    dir_only = line.endswith("/")
+    line = line.rstrip("/")
+    anchored = "/" in line
+    line = line.lstrip("/")
+    if not line:
+        return None
+
+    out: list[str] = []
+    i, n = 0, len(line)
+    while i < n:
+        if line.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+            continue
+        if line.startswith("**", i):
+            out.append(".*")
+            i += 2
+            continue
+        c = line[i]
+        if c == "*":
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[" and (j := line.find("]", i + 2)) != -1:
+            body = line[i + 1:j]
+            if body.startswith("!"):
+                body = "^" + body[1:]
+            out.append("[" + body.replace("\\", "\\\\") + "]")
+            i = j
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            out.append(re.escape(line[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    regex = "".join(out)
+    if not anchored:
+        regex = "(?:.*/)?" + regex
+    return re.compile(regex), negate, dir_only
+
+
+def _read_ignore_file(path: str) -> list[tuple[re.Pattern, bool, bool]]:
+    try:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            return [rule for rule in map(_ignore_rule, f.read().splitlines()) if rule]
+    except OSError:
+        return []
+
+
+def _is_ignored(rel: str, is_dir: bool, rule_sets: list[tuple[str, list]]) -> bool:
+    """Apply ``(base, rules)`` sets in order; the last matching rule wins."""
+    ignored = False
+    for base, rules in rule_sets:
+        sub = rel[len(base):]
+        for regex, negate, dir_only in rules:
+            if (is_dir or not dir_only) and regex.fullmatch(sub):
+                ignored = not negate
+    return ignored
+
+
 def _collect_files(
     root: Path,
     extensions: set[str] | None = None,
-) -> list[Path]:
-    """Recursively collect uploadable files from a directory."""
-    files: list[Path] = []
-    for p in sorted(root.rglob("*")):
-        if not p.is_file():
-            continue
-        if extensions and p.suffix.lower() not in extensions:
-            continue
-        if _resolve_mime(p) is not None:
-            files.append(p)
-    return files
+    excludes: Iterable[str] | None = None,
+) -> Iterator[Path]:
+    """Lazily yield uploadable files under *root*, in sorted path order.
+
+    Walks with ``os.scandir``, reusing each entry's cached file type rather
+    than stat-ing every path.  Directories in ``IGNORED_DIRS`` are never
+    entered, and ``.gitignore`` files found along the way apply to their
+    subtree as git would.  *excludes* are extra gitignore-style patterns,
+    relative to *root*, that take precedence over the ``.gitignore`` files.
+    """
+    extra = [rule for rule in map(_ignore_rule, excludes or ()) if rule]
+
+    def walk(dirpath: str, rel: str, rule_sets: list) -> Iterator[Path]:
+        rules = _read_ignore_file(os.path.join(dirpath, ".gitignore"))
+        if rules:
+            rule_sets = rule_sets + [(rel, rules)]
+        active = rule_sets + [("", extra)] if extra else rule_sets
+        try:
+            with os.scandir(dirpath) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            return
+        for entry in entries:
+            entry_rel = rel + entry.name
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+                is_file = not is_dir and entry.is_file()
+            except OSError:
+                continue
+            if is_dir:
+                if entry.name not in IGNORED_DIRS and not _is_ignored(entry_rel, True, active):
+                    yield from walk(entry.path, entry_rel + "/", rule_sets)
+            elif is_file and not _is_ignored(entry_rel, False, active):
+                p = Path(entry.path)
+                if extensions and p.suffix.lower() not in extensions:
+                    continue
+                if _resolve_mime(p) is not None:
+                    yield p
+
+    return walk(str(root), "", [])
 
 
 def get_api_key() -> str:
@@ -248,12 +514,16 @@ def _percentile(sorted_values: list[float], p: float) -> float:
     return sorted_values[f] + (k - f) * (sorted_values[c] - sorted_values[f])
 
 
-def _estimate_context_cost(context_path: Path, extensions: set[str] | None = None) -> dict:
+def _estimate_context_cost(
+    context_path: Path,
+    extensions: set[str] | None = None,
+    excludes: Iterable[str] | None = None,
+) -> dict:
     """Estimate the cost of uploading context files."""
     if context_path.is_file():
         files = [context_path] if _resolve_mime(context_path) else []
     elif context_path.is_dir():
-        files = _collect_files(context_path, extensions)
+        files = list(_collect_files(context_path, extensions, excludes))
     else:
         return {"files": 0, "total_bytes": 0, "estimated_tokens": 0, "estimated_cost_usd": 0.0}
 
@@ -498,10 +768,95 @@ def resolve_store_name(name_or_alias: str) -> str:
 # --context helpers
 # ---------------------------------------------------------------------------
 
+def _upload_concurrently(
+    client: genai.Client,
+    store_name: str,
+    files: Iterable[Path],
+    max_concurrency: int,
+    on_result: Callable[[Path, Exception | None], None],
+) -> None:
+    """Upload *files* with at most *max_concurrency* uploads in flight.
+
+    Uploads run on a thread pool.  The long-running indexing operations they
+    return don't hold an upload slot; they are polled together, one sweep per
+    poll interval, instead of sleeping on each file in turn.  *files* is
+    consumed lazily.  *on_result* is called from this thread once per file
+    with ``None`` on success or the exception that failed it; one file
+    failing never affects the others.
+    """
+    max_concurrency = max(1, max_concurrency)
+    queue = iter(files)
+    submitting: dict[Future, Path] = {}
+    indexing: list[tuple[Path, object]] = []
+
+    def finish(filepath: Path, operation: object) -> None:
+        error = getattr(operation, "error", None)
+        on_result(filepath, RuntimeError(str(error)) if error else None)
+
+    with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+        exhausted = False
+        next_sweep = time.monotonic() + UPLOAD_POLL_INTERVAL
+        while True:
+            while not exhausted and len(submitting) < max_concurrency:
+                filepath = next(queue, None)
+                if filepath is None:
+                    exhausted = True
+                    break
+                fut = pool.submit(
+                    client.file_search_stores.upload_to_file_search_store,
+                    file=str(filepath),
+                    file_search_store_name=store_name,
+                    config={"display_name": filepath.name},
+                )
+                submitting[fut] = filepath
+            if not submitting and not indexing:
+                break
+
+            # Wait for a submission to land, but never past the next sweep.
+            if submitting:
+                timeout = UPLOAD_POLL_INTERVAL
+                if indexing:
+                    timeout = max(0.0, next_sweep - time.monotonic())
+                done, _ = wait(submitting, timeout=timeout, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    filepath = submitting.pop(fut)
+                    try:
+                        operation = fut.result()
+                    except Exception as exc:
+                        on_result(filepath, exc)
+                        continue
+                    if operation.done:
+                        finish(filepath, operation)
+                    else:
+                        if not indexing:
+                            next_sweep = time.monotonic() + UPLOAD_POLL_INTERVAL
+                        indexing.append((filepath, operation))
+            elif indexing:
+                time.sleep(max(0.0, next_sweep - time.monotonic()))
+            if not indexing or time.monotonic() < next_sweep:
+                continue
+
+            next_sweep = time.monotonic() + UPLOAD_POLL_INTERVAL
+            still_indexing: list[tuple[Path, object]] = []
+            for filepath, operation in indexing:
+                try:
+                    operation = client.operations.get(operation)
+                except Exception as exc:
+                    on_result(filepath, exc)
+                    continue
+                if operation.done:
+                    finish(filepath, operation)
+                else:
+                    still_indexing.append((filepath, operation))
+            indexing = still_indexing
+
+
 def _upload_context_files(
     client: genai.Client,
     context_path: Path,
     extensions: set[str] | None = None,
+    max_concurrency: int = DEFAULT_UPLOAD_CONCURRENCY,
+    excludes: Iterable[str] | None = None,
 ) -> tuple[str, int, int]:
     """Create an ephemeral store, upload files from *context_path*.
 
@@ -517,62 +872,75 @@ def _upload_context_files(
     store_name: str = store.name
     console.print(f"Created context store: [bold]{display_name}[/bold]")
 
-    # Collect files
+    # Collect files -- lazily, so uploads start while the tree is walked
     if context_path.is_file():
         if _resolve_mime(context_path) is None:
             console.print(f"[red]Error:[/red] Unsupported file type: {context_path.suffix}")
             sys.exit(1)
-        files = [context_path]
+        files: Iterable[Path] = [context_path]
     elif context_path.is_dir():
-        files = _collect_files(context_path, extensions)
-        if not files:
-            console.print("[yellow]No uploadable files found in context path.[/yellow]")
-            # Clean up the empty store
-            try:
-                client.file_search_stores.delete(name=store_name)
-            except Exception:
-                pass
-            sys.exit(1)
+        files = _collect_files(context_path, extensions, excludes)
     else:
         console.print(f"[red]Error:[/red] Context path is not a file or directory: {context_path}")
         sys.exit(1)
 
-    console.print(f"Uploading [bold]{len(files)}[/bold] file(s) to context store...")
+    console.print("Uploading context files...")
 
     # Smart-sync always on for context stores
     state = load_state()
-    hash_cache: dict[str, str] = state.get("_hashCache", {}).get(store_name, {})
+    hash_cache: dict[str, dict] = state.get("_hashCache", {}).get(store_name, {})
 
-    uploaded = 0
+    file_count = 0
+    total_bytes = 0
     skipped = 0
-    for filepath in files:
-        rel = str(filepath)
-        current_hash = _file_hash(filepath)
-        if hash_cache.get(rel) == current_hash:
-            skipped += 1
-            continue
-        try:
-            operation = client.file_search_stores.upload_to_file_search_store(
-                file=str(filepath),
-                file_search_store_name=store_name,
-                config={"display_name": filepath.name},
-            )
-            while not operation.done:
-                time.sleep(2)
-                operation = client.operations.get(operation)
-            uploaded += 1
-            hash_cache[rel] = current_hash
-        except Exception as exc:
+    uploaded = 0
+    hashes: dict[Path, dict] = {}
+    hash_stats: dict = {}
+
+    def to_upload() -> Iterator[Path]:
+        nonlocal file_count, total_bytes, skipped
+        for filepath, entry, exc in _hash_files(files, hash_cache, stats=hash_stats):
+            if exc is not None:
+                console.print(f"[yellow]Warning:[/yellow] Failed to read {filepath.name}: {exc}")
+                continue
+            file_count += 1
+            total_bytes += entry["size"]
+            if _cache_entry_hash(hash_cache.get(str(filepath))) == entry["sha256"]:
+                hash_cache[str(filepath)] = entry
+                skipped += 1
+                continue
+            hashes[filepath] = entry
+            yield filepath
+
+    def on_result(filepath: Path, exc: Exception | None) -> None:
+        nonlocal uploaded
+        if exc is not None:
             console.print(f"[yellow]Warning:[/yellow] Failed to upload {filepath.name}: {exc}")
+            return
+        uploaded += 1
+        hash_cache[str(filepath)] = hashes[filepath]
+
+    _upload_concurrently(client, store_name, to_upload(), max_concurrency, on_result)
+
+    if not file_count:
+        console.print("[yellow]No uploadable files found in context path.[/yellow]")
+        # Clean up the empty store
+        try:
+            client.file_search_stores.delete(name=store_name)
+        except Exception:
+            pass
+        sys.exit(1)
+    if hash_stats["files"]:
+        console.print(f"[dim]{_hash_throughput(hash_stats)}[/dim]")
 
     # Persist hash cache
     state = load_state()
     state.setdefault("_hashCache", {})[store_name] = hash_cache
     save_state(state)
 
-    console.print(f"[green]Context uploaded:[/green] {uploaded} new, {skipped} unchanged")
-
-    total_bytes = sum(f.stat().st_size for f in files)
+    console.print(
+        f"[green]Context uploaded:[/green] {file_count} file(s): {uploaded} new, {skipped} unchanged"
+    )
 
     # Track as ephemeral context store in state
     state = load_state()
@@ -581,7 +949,7 @@ def _upload_context_files(
     state.setdefault("fileSearchStores", {})[display_name] = store_name
     save_state(state)
 
-    return store_name, len(files), total_bytes
+    return store_name, file_count, total_bytes
 
 
 def _cleanup_context_store(client: genai.Client, store_name: str) -> None:
@@ -659,9 +1027,10 @@ def cmd_start(args: argparse.Namespace) -> None:
     if args.store:
         file_search_store_names = [resolve_store_name(args.store)]
 
-    # Parse --context path and extensions (needed for both dry-run and real run)
+    # Parse --context path, extensions and excludes (needed for both dry-run and real run)
     context_path: Path | None = None
     ctx_extensions: set[str] | None = None
+    ctx_excludes: list[str] | None = getattr(args, "context_exclude", None)
     if getattr(args, "context", None):
         context_path = Path(args.context).resolve()
         if not context_path.exists():
@@ -695,7 +1064,7 @@ def cmd_start(args: argparse.Namespace) -> None:
         }
 
         if context_path is not None:
-            ctx_est = _estimate_context_cost(context_path, ctx_extensions)
+            ctx_est = _estimate_context_cost(context_path, ctx_extensions, ctx_excludes)
             estimate["estimates"]["context_upload"] = ctx_est
 
         research_est = _estimate_research_cost(grounded, history)
@@ -731,6 +1100,8 @@ def cmd_start(args: argparse.Namespace) -> None:
     if context_path is not None:
         context_store_name, context_file_count, context_bytes = _upload_context_files(
             client, context_path, ctx_extensions,
+            max_concurrency=getattr(args, "context_concurrency", DEFAULT_UPLOAD_CONCURRENCY),
+            excludes=ctx_excludes,
         )
         if file_search_store_names is None:
             file_search_store_names = []
@@ -1181,6 +1552,14 @@ def build_parser() -> argparse.ArgumentParser:
         "--context-extensions", nargs="*", metavar="EXT",
         help="Filter context uploads by extension (comma or space separated, e.g. py,md or .py .md)",
     )
+    start_p.add_argument(
+        "--context-exclude", action="append", metavar="PATTERN",
+        help="Skip context paths matching a .gitignore-style pattern (repeatable)",
+    )
+    start_p.add_argument(
+        "--context-concurrency", type=int, default=DEFAULT_UPLOAD_CONCURRENCY, metavar="N",
+        help=f"Maximum context files uploading at once (default: {DEFAULT_UPLOAD_CONCURRENCY})",
+    )
     start_p.add_argument(
         "--keep-context", action="store_true",
         help="Keep the ephemeral context store after research completes (default: auto-delete)",
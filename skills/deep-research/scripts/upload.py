@@ -14,12 +14,19 @@ from __future__ import annotations
 
 import argparse
 import hashlib
+import itertools
 import json
 import mimetypes
+import mmap
 import os
+import re
 import sys
+import threading
 import time
 import uuid
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from pathlib import Path
 
 from google import genai
@@ -28,6 +35,28 @@ from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TaskPr
 
 console = Console(stderr=True)
 
+
+def _env_int(name: str, default: int) -> int:
+    """Integer from the environment, falling back to *default* if unset or malformed."""
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+# Maximum files uploading at once (overridable with --concurrency).
+DEFAULT_UPLOAD_CONCURRENCY = _env_int("GEMINI_DEEP_RESEARCH_UPLOAD_CONCURRENCY", 8)
+UPLOAD_POLL_INTERVAL = 2.0
+# Progress is written to the operation's state entry at most this often.
+CHECKPOINT_INTERVAL = 5.0
+# Files hashed at once (overridable with --hash-workers).  hashlib releases
+# the GIL while digesting large buffers, so threads use every core.
+DEFAULT_HASH_WORKERS = _env_int("GEMINI_DEEP_RESEARCH_HASH_WORKERS", 0) or min(
+    32, os.cpu_count() or 4
+)
+HASH_BUFFER_SIZE = 1 << 20
+# Files at least this large are hashed straight from an mmap.
+HASH_MMAP_THRESHOLD = 16 << 20
+
 # ---------------------------------------------------------------------------
 # MIME type maps (derived from docs/file-search-mime-types.md)
 # ---------------------------------------------------------------------------
@@ -111,6 +140,13 @@ BINARY_EXTENSIONS: set[str] = {
     ".ttf", ".otf", ".woff", ".woff2", ".eot",
 }
 
+# Directories never descended into: VCS metadata and dependency/tool caches.
+IGNORED_DIRS: set[str] = {
+    ".git", ".hg", ".svn",
+    "node_modules", "__pycache__", ".venv", "venv",
+    ".tox", ".nox", ".mypy_cache", ".pytest_cache", ".ruff_cache",
+}
+
 # ---------------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------------
@@ -144,7 +180,11 @@ def load_state() -> dict:
 
 
 def save_state(state: dict) -> None:
-    get_state_path().write_text(json.dumps(state, indent=2) + "\n")
+    # Write-then-rename: an interrupt mid-checkpoint must not corrupt the state file.
+    path = get_state_path()
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(state, indent=2) + "\n")
+    os.replace(tmp, path)
 
 
 def resolve_mime(filepath: Path) -> str | None:
@@ -179,36 +219,265 @@ def resolve_mime(filepath: Path) -> str | None:
 
 
 def file_hash(filepath: Path) -> str:
-    """Compute SHA-256 hash of a file for smart-sync."""
+    """Compute SHA-256 hash of a file for smart-sync.
+
+    Large files are digested from an mmap in one call, the rest through a
+    reused 1 MiB buffer, so hashing runs at I/O speed rather than paying a
+    Python round trip per 8 KB chunk.
+    """
     h = hashlib.sha256()
     with open(filepath, "rb") as f:
-        for chunk in iter(lambda: f.read(8192), b""):
-            h.update(chunk)
+        if os.fstat(f.fileno()).st_size >= HASH_MMAP_THRESHOLD:
+            try:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    h.update(mm)
+                return h.hexdigest()
+            except (OSError, ValueError):
+                # Not mappable (special filesystem, file shrank): read it instead.
+                h = hashlib.sha256()
+                f.seek(0)
+        buf = bytearray(HASH_BUFFER_SIZE)
+        view = memoryview(buf)
+        while n := f.readinto(buf):
+            h.update(view[:n])
     return h.hexdigest()
 
 
+# Files modified this recently may still change within the same mtime tick,
+# so their fingerprint is not trusted on the next run (cf. git's "racy clean").
+RACY_WINDOW_NS = 2_000_000_000
+
+
+def _stat_fingerprint(st: os.stat_result) -> dict:
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "ino": st.st_ino}
+
+
+def cache_entry_hash(entry: dict | str | None) -> str | None:
+    """SHA-256 recorded in a hash-cache entry (older caches store the bare hash)."""
+    if isinstance(entry, str):
+        return entry
+    return entry.get("sha256") if entry else None
+
+
+def cached_file_hash(filepath: Path, entry: dict | str | None, verify: bool = False) -> dict:
+    """Return the hash-cache entry for *filepath*, rehashing only if needed.
+
+    The file is read only when its (size, mtime_ns, inode) fingerprint
+    differs from *entry*, the entry predates fingerprints or was racy, or
+    *verify* forces a full rehash.
+    """
+    st = filepath.stat()
+    fingerprint = _stat_fingerprint(st)
+    if (
+        not verify
+        and isinstance(entry, dict)
+        and not entry.get("racy")
+        and all(entry.get(k) == v for k, v in fingerprint.items())
+    ):
+        return entry
+    new_entry = {"sha256": file_hash(filepath), **fingerprint}
+    if time.time_ns() - st.st_mtime_ns < RACY_WINDOW_NS:
+        new_entry["racy"] = True
+    return new_entry
+
+
+def hash_files(
+    files: Iterable[Path],
+    hash_cache: dict,
+    verify: bool = False,
+    workers: int = DEFAULT_HASH_WORKERS,
+    stats: dict | None = None,
+) -> Iterator[tuple[Path, dict | None, Exception | None]]:
+    """Hash *files* on a thread pool, yielding ``(path, entry, error)`` in order.
+
+    Runs :func:`cached_file_hash` against ``hash_cache[str(path)]`` for up to
+    *workers* files at once, reading ahead a bounded window so *files* may
+    be a lazy iterator.  A file that cannot be read yields its error instead
+    of an entry.  Bytes actually read (stat fast-path hits are free) and the
+    time any hash was in flight are accumulated into *stats* for
+    :func:`hash_throughput` -- time spent waiting on the consumer (e.g. for
+    an upload slot) does not count against throughput.
+    """
+    workers = max(1, workers)
+    if stats is None:
+        stats = {}
+    for key in ("files", "bytes", "seconds"):
+        stats.setdefault(key, 0)
+    lock = threading.Lock()
+    active = 0
+    busy_since = 0.0
+
+    def work(filepath: Path):
+        nonlocal active, busy_since
+        with lock:
+            if not active:
+                busy_since = time.monotonic()
+            active += 1
+        try:
+            cached = hash_cache.get(str(filepath))
+            entry = cached_file_hash(filepath, cached, verify)
+        finally:
+            with lock:
+                active -= 1
+                if not active:
+                    stats["seconds"] += time.monotonic() - busy_since
+        return entry, entry is not cached
+
+    pending: deque[tuple[Path, Future]] = deque()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+
+        def drain_one() -> tuple[Path, dict | None, Exception | None]:
+            filepath, future = pending.popleft()
+            try:
+                entry, hashed = future.result()
+            except Exception as exc:
+                return filepath, None, exc
+            if hashed:
+                stats["files"] += 1
+                stats["bytes"] += entry["size"]
+            return filepath, entry, None
+
+        for filepath in files:
+            pending.append((filepath, pool.submit(work, filepath)))
+            if len(pending) >= 4 * workers:
+                yield drain_one()
+        while pending:
+            yield drain_one()
+
+
+def hash_throughput(stats: dict) -> str:
+    """One-line summary of a :func:`hash_files` run, e.g. for the console."""
+    mb = stats.get("bytes", 0) / 1e6
+    seconds = stats.get("seconds", 0)
+    rate = mb / seconds if seconds else 0.0
+    return f"Hashed {stats.get('files', 0)} file(s), {mb:.1f} MB at {rate:.1f} MB/s"
+
+
+def _ignore_rule(line: str) -> tuple[re.Pattern, bool, bool] | None:
+    """Compile one ``.gitignore`` line into ``(regex, negate, dir_only)``.
+
+    Supports the common subset of gitignore syntax: ``#`` comments, ``!``
+    negation, trailing ``/`` for directories only, leading or inner ``/``
+    anchoring the pattern to its base directory, and ``*``, ``?``, ``[...]``
+    and ``**`` wildcards.
+    """
+    line = re.sub(r"(?<!\\)\s+$", "", line)
+    if not line or line.startswith("#"):
+        return None
+    negate = line.startswith("!")
+    if negate:
+        line = line[1:]
+    dir_only = line.endswith("/")
+    line = line.rstrip("/")
+    anchored = "/" in line
+    line = line.lstrip("/")
+    if not line:
+        return None
+
+    out: list[str] = []
+    i, n = 0, len(line)
+    while i < n:
+        if line.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+            continue
+        if line.startswith("**", i):
+            out.append(".*")
+            i += 2
+            continue
+        c = line[i]
+        if c == "*":
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[" and (j := line.find("]", i + 2)) != -1:
+            body = line[i + 1:j]
+            if body.startswith("!"):
+                body = "^" + body[1:]
+            out.append("[" + body.replace("\\", "\\\\") + "]")
+            i = j
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            out.append(re.escape(line[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    regex = "".join(out)
+    if not anchored:
+        regex = "(?:.*/)?" + regex
+    return re.compile(regex), negate, dir_only
+
+
+def _read_ignore_file(path: str) -> list[tuple[re.Pattern, bool, bool]]:
+    try:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            return [rule for rule in map(_ignore_rule, f.read().splitlines()) if rule]
+    except OSError:
+        return []
+
+
+def _is_ignored(rel: str, is_dir: bool, rule_sets: list[tuple[str, list]]) -> bool:
+    """Apply ``(base, rules)`` sets in order; the last matching rule wins."""
+    ignored = False
+    for base, rules in rule_sets:
+        sub = rel[len(base):]
+        for regex, negate, dir_only in rules:
+            if (is_dir or not dir_only) and regex.fullmatch(sub):
+                ignored = not negate
+    return ignored
+
+
 def collect_files(
     root: Path,
     extensions: set[str] | None = None,
-) -> list[Path]:
-    """Recursively collect uploadable files from a directory."""
-    files: list[Path] = []
-    for p in sorted(root.rglob("*")):
-        if not p.is_file():
-            continue
-        if extensions and p.suffix.lower() not in extensions:
-            continue
-        if resolve_mime(p) is not None:
-            files.append(p)
-    return files
+    excludes: Iterable[str] | None = None,
+) -> Iterator[Path]:
+    """Lazily yield uploadable files under *root*, in sorted path order.
+
+    Walks with ``os.scandir``, reusing each entry's cached file type rather
+    than stat-ing every path.  Directories in ``IGNORED_DIRS`` are never
+    entered, and ``.gitignore`` files found along the way apply to their
+    subtree as git would.  *excludes* are extra gitignore-style patterns,
+    relative to *root*, that take precedence over the ``.gitignore`` files.
+    """
+    extra = [rule for rule in map(_ignore_rule, excludes or ()) if rule]
+
+    def walk(dirpath: str, rel: str, rule_sets: list) -> Iterator[Path]:
+        rules = _read_ignore_file(os.path.join(dirpath, ".gitignore"))
+        if rules:
+            rule_sets = rule_sets + [(rel, rules)]
+        active = rule_sets + [("", extra)] if extra else rule_sets
+        try:
+            with os.scandir(dirpath) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            return
+        for entry in entries:
+            entry_rel = rel + entry.name
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+                is_file = not is_dir and entry.is_file()
+            except OSError:
+                continue
+            if is_dir:
+                if entry.name not in IGNORED_DIRS and not _is_ignored(entry_rel, True, active):
+                    yield from walk(entry.path, entry_rel + "/", rule_sets)
+            elif is_file and not _is_ignored(entry_rel, False, active):
+                p = Path(entry.path)
+                if extensions and p.suffix.lower() not in extensions:
+                    continue
+                if resolve_mime(p) is not None:
+                    yield p
+
+    return walk(str(root), "", [])
 
 
-def load_hash_cache(state: dict, store_name: str) -> dict[str, str]:
+def load_hash_cache(state: dict, store_name: str) -> dict[str, dict]:
     """Load the per-store file hash cache from state."""
     return state.get("_hashCache", {}).get(store_name, {})
 
 
-def save_hash_cache(state: dict, store_name: str, cache: dict[str, str]) -> None:
+def save_hash_cache(state: dict, store_name: str, cache: dict[str, dict]) -> None:
     state.setdefault("_hashCache", {})[store_name] = cache
     save_state(state)
 
@@ -216,20 +485,148 @@ def save_hash_cache(state: dict, store_name: str, cache: dict[str, str]) -> None
 # Upload logic
 # ---------------------------------------------------------------------------
 
+def upload_concurrently(
+    client: genai.Client,
+    store_name: str,
+    files: Iterable[Path],
+    max_concurrency: int,
+    on_result: Callable[[Path, Exception | None], None],
+    on_progress: Callable[[int, int], None] | None = None,
+) -> None:
+    """Upload *files* with at most *max_concurrency* uploads in flight.
+
+    Uploads run on a thread pool.  The long-running indexing operations they
+    return don't hold an upload slot; they are polled together, one sweep per
+    poll interval, instead of sleeping on each file in turn.  *files* is
+    consumed lazily.  *on_result* is called from this thread once per file
+    with ``None`` on success or the exception that failed it; *on_progress*
+    receives the (uploading, indexing) counts as they change.
+
+    Duplicated in research.py (PEP 723 standalone scripts).
+    """
+    max_concurrency = max(1, max_concurrency)
+    queue = iter(files)
+    submitting: dict[Future, Path] = {}
+    indexing: list[tuple[Path, object]] = []
+
+    def finish(filepath: Path, operation: object) -> None:
+        error = getattr(operation, "error", None)
+        on_result(filepath, RuntimeError(str(error)) if error else None)
+
+    with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+        exhausted = False
+        next_sweep = time.monotonic() + UPLOAD_POLL_INTERVAL
+        while True:
+            while not exhausted and len(submitting) < max_concurrency:
+                filepath = next(queue, None)
+                if filepath is None:
+                    exhausted = True
+                    break
+                fut = pool.submit(
+                    client.file_search_stores.upload_to_file_search_store,
+                    file=str(filepath),
+                    file_search_store_name=store_name,
+                    config={"display_name": filepath.name},
+                )
+                submitting[fut] = filepath
+            if on_progress is not None:
+                on_progress(len(submitting), len(indexing))
+            if not submitting and not indexing:
+                break
+
+            # Wait for a submission to land, but never past the next sweep.
+            if submitting:
+                timeout = UPLOAD_POLL_INTERVAL
+                if indexing:
+                    timeout = max(0.0, next_sweep - time.monotonic())
+                done, _ = wait(submitting, timeout=timeout, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    filepath = submitting.pop(fut)
+                    try:
+                        operation = fut.result()
+                    except Exception as exc:
+                        on_result(filepath, exc)
+                        continue
+                    if operation.done:
+                        finish(filepath, operation)
+                    else:
+                        if not indexing:
+                            next_sweep = time.monotonic() + UPLOAD_POLL_INTERVAL
+                        indexing.append((filepath, operation))
+            elif indexing:
+                time.sleep(max(0.0, next_sweep - time.monotonic()))
+            if not indexing or time.monotonic() < next_sweep:
+                continue
+
+            next_sweep = time.monotonic() + UPLOAD_POLL_INTERVAL
+            still_indexing: list[tuple[Path, object]] = []
+            for filepath, operation in indexing:
+                try:
+                    operation = client.operations.get(operation)
+                except Exception as exc:
+                    on_result(filepath, exc)
+                    continue
+                if operation.done:
+                    finish(filepath, operation)
+                else:
+                    still_indexing.append((filepath, operation))
+            indexing = still_indexing
+
+
 def upload_files(
     client: genai.Client,
-    files: list[Path],
+    files: Iterable[Path],
     store_name: str,
     smart_sync: bool = False,
+    op_id: str | None = None,
+    max_concurrency: int = DEFAULT_UPLOAD_CONCURRENCY,
+    verify: bool = False,
+    hash_workers: int = DEFAULT_HASH_WORKERS,
 ) -> dict:
-    """Upload a list of files to a store, returning an operation summary."""
+    """Upload files to a store, returning an operation summary.
+
+    *files* is consumed lazily (e.g. straight from :func:`collect_files`),
+    so uploads start while the tree is still being walked; the progress
+    total grows as files are discovered.
+
+    With *op_id*, progress is checkpointed into that ``uploadOperations``
+    entry every few seconds: finished files are appended to ``doneFiles``
+    and the hash cache is saved, so an interrupted run can be resumed with
+    ``--resume`` without re-uploading what already landed -- files already
+    in ``doneFiles`` are counted but not uploaded again.
+    """
     state = load_state()
     hash_cache = load_hash_cache(state, store_name)
+    op = state.get("uploadOperations", {}).get(op_id, {}) if op_id else {}
 
-    completed = 0
-    skipped = 0
+    # Counters carry over when resuming; failed files are retried, so their
+    # tally starts again.
+    completed = op.get("completedFiles", 0)
+    skipped = op.get("skippedFiles", 0)
     failed = 0
     failed_list: list[dict] = []
+    done_files: list[str] = list(op.get("doneFiles", []))
+    already_done = set(done_files)
+    total = 0
+    hashes: dict[Path, dict] = {}
+    hash_stats: dict = {}
+    last_checkpoint = time.monotonic()
+
+    def checkpoint() -> None:
+        nonlocal last_checkpoint
+        last_checkpoint = time.monotonic()
+        state = load_state()
+        state.setdefault("_hashCache", {})[store_name] = hash_cache
+        if op_id and op_id in state.get("uploadOperations", {}):
+            state["uploadOperations"][op_id].update({
+                "completedFiles": completed,
+                "skippedFiles": skipped,
+                "failedFiles": failed,
+                "failedFilesList": failed_list,
+                "doneFiles": done_files,
+                "totalFiles": total,
+            })
+        save_state(state)
 
     with Progress(
         SpinnerColumn(),
@@ -238,63 +635,173 @@ def upload_files(
         TaskProgressColumn(),
         console=console,
     ) as progress:
-        task = progress.add_task("Uploading...", total=len(files))
-
-        for filepath in files:
+        task = progress.add_task("Uploading...", total=None)
+
+        def supported():
+            """Yield files with an uploadable MIME type, failing the rest."""
+            nonlocal failed, total
+            for filepath in files:
+                total += 1
+                progress.update(task, total=total)
+                if str(filepath) in already_done:
+                    progress.advance(task)
+                    continue
+                if resolve_mime(filepath) is None:
+                    failed += 1
+                    failed_list.append({"file": str(filepath), "error": "Unsupported file type"})
+                    progress.advance(task)
+                    continue
+                yield filepath
+
+        def to_upload():
+            """Yield files that need uploading, settling the rest inline."""
+            nonlocal skipped, failed
+            # Hash for smart-sync comparison and cache update, many files at
+            # once; an unchanged stat fingerprint reuses the cached hash.
+            for filepath, entry, exc in hash_files(
+                supported(), hash_cache, verify, hash_workers, hash_stats,
+            ):
+                rel = str(filepath)
+                if exc is not None:
+                    failed += 1
+                    failed_list.append({"file": rel, "error": str(exc)})
+                    progress.advance(task)
+                    continue
+
+                # Smart-sync: skip if hash unchanged
+                if smart_sync and cache_entry_hash(hash_cache.get(rel)) == entry["sha256"]:
+                    hash_cache[rel] = entry
+                    skipped += 1
+                    done_files.append(rel)
+                    progress.advance(task)
+                    continue
+
+                hashes[filepath] = entry
+                yield filepath
+
+        def on_result(filepath: Path, exc: Exception | None) -> None:
+            nonlocal completed, failed
             rel = str(filepath)
-            mime = resolve_mime(filepath)
-            if mime is None:
-                failed += 1
-                failed_list.append({"file": rel, "error": "Unsupported file type"})
-                progress.advance(task)
-                continue
-
-            # Compute hash for smart-sync comparison and cache update
-            current_hash = file_hash(filepath)
-
-            # Smart-sync: skip if hash unchanged
-            if smart_sync and hash_cache.get(rel) == current_hash:
-                skipped += 1
-                progress.update(task, description=f"Skipped: {filepath.name}")
-                progress.advance(task)
-                continue
-
-            try:
-                progress.update(task, description=f"Uploading: {filepath.name}")
-                operation = client.file_search_stores.upload_to_file_search_store(
-                    file=str(filepath),
-                    file_search_store_name=store_name,
-                    config={"display_name": filepath.name},
-                )
-                # Poll until done
-                while not operation.done:
-                    time.sleep(2)
-                    operation = client.operations.get(operation)
-
+            if exc is None:
                 completed += 1
                 # Always update hash cache on successful upload (enables future smart-sync)
-                hash_cache[rel] = current_hash
-            except Exception as exc:
+                hash_cache[rel] = hashes.pop(filepath)
+                done_files.append(rel)
+            else:
                 failed += 1
+                hashes.pop(filepath, None)
                 failed_list.append({"file": rel, "error": str(exc)})
-
             progress.advance(task)
+            if time.monotonic() - last_checkpoint >= CHECKPOINT_INTERVAL:
+                checkpoint()
+
+        def on_progress(uploading: int, indexing: int) -> None:
+            progress.update(task, description=f"Uploading {uploading}, indexing {indexing}")
 
-    # Always persist hash cache so future --smart-sync runs can skip unchanged files
-    save_hash_cache(state, store_name, hash_cache)
+        try:
+            upload_concurrently(
+                client, store_name, to_upload(), max_concurrency, on_result, on_progress,
+            )
+        finally:
+            # Always persist hash cache so future --smart-sync runs can skip
+            # unchanged files -- and so an interrupted run can resume.
+            checkpoint()
+
+    if hash_stats["files"]:
+        console.print(f"[dim]{hash_throughput(hash_stats)}[/dim]")
 
     return {
-        "totalFiles": len(files),
+        "totalFiles": total,
         "completedFiles": completed,
         "skippedFiles": skipped,
         "failedFiles": failed,
         "failedFilesList": failed_list,
+        "hashedBytes": hash_stats["bytes"],
+        "hashMBps": round(hash_stats["bytes"] / 1e6 / hash_stats["seconds"], 1)
+        if hash_stats["bytes"] and hash_stats["seconds"] else None,
     }
 
 # ---------------------------------------------------------------------------
 # Subcommands
 # ---------------------------------------------------------------------------
 
+def _finish_operation(op_id: str, result: dict) -> None:
+    """Record the final outcome of an upload operation and print a summary."""
+    state = load_state()
+    op = state["uploadOperations"][op_id]
+    op.update(result)
+    op["status"] = "failed" if result["failedFiles"] == result["totalFiles"] else "completed"
+    op["completedAt"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+    save_state(state)
+
+    # Summary
+    console.print()
+    console.print(f"[green]Completed:[/green] {result['completedFiles']}")
+    console.print(f"[yellow]Skipped:[/yellow]   {result['skippedFiles']}")
+    console.print(f"[red]Failed:[/red]    {result['failedFiles']}")
+    if result["failedFilesList"]:
+        console.print("[red]Failed files:[/red]")
+        for f in result["failedFilesList"]:
+            console.print(f"  {f['file']}: {f['error']}")
+
+    print(json.dumps({"operationId": op_id, **result}))
+
+
+def _run_operation(
+    client: genai.Client, op_id: str, files: Iterable[Path], max_concurrency: int,
+    hash_workers: int = DEFAULT_HASH_WORKERS,
+) -> None:
+    """Upload *files* for a recorded operation, marking it interrupted on Ctrl-C."""
+    state = load_state()
+    op = state["uploadOperations"][op_id]
+    try:
+        result = upload_files(
+            client, files, op["storeName"], op.get("smartSync", False), op_id, max_concurrency,
+            op.get("verify", False), hash_workers,
+        )
+    except KeyboardInterrupt:
+        state = load_state()
+        state["uploadOperations"][op_id]["status"] = "interrupted"
+        save_state(state)
+        console.print()
+        console.print(
+            f"[yellow]Interrupted.[/yellow] Resume with: upload.py --resume {op_id}"
+        )
+        sys.exit(130)
+    _finish_operation(op_id, result)
+
+
+def cmd_resume(args: argparse.Namespace) -> None:
+    """Resume an interrupted upload operation, skipping files already done."""
+    state = load_state()
+    op = state.get("uploadOperations", {}).get(args.resume)
+    if not op:
+        console.print(f"[red]Error:[/red] Operation not found: {args.resume}")
+        sys.exit(1)
+    if op.get("status") == "completed":
+        console.print(f"[yellow]Operation {args.resume} already completed.[/yellow]")
+        print(json.dumps(op, indent=2))
+        return
+
+    target = Path(op["path"])
+    if not target.exists():
+        console.print(f"[red]Error:[/red] Path not found: {target}")
+        sys.exit(1)
+    extensions = set(op["extensions"]) if op.get("extensions") else None
+    if target.is_file():
+        files: Iterable[Path] = [target]
+    else:
+        files = collect_files(target, extensions, op.get("excludes"))
+    console.print(
+        f"Resuming [bold]{args.resume}[/bold]: "
+        f"{len(op.get('doneFiles', []))} file(s) already done."
+    )
+
+    op["status"] = "in_progress"
+    save_state(state)
+    _run_operation(get_client(), args.resume, files, args.concurrency, args.hash_workers)
+
+
 def cmd_upload(args: argparse.Namespace) -> None:
     """Upload files or directories to a file search store."""
     client = get_client()
@@ -324,13 +831,16 @@ def cmd_upload(args: argparse.Namespace) -> None:
         if mime is None:
             console.print(f"[red]Error:[/red] Unsupported file type: {target.suffix}")
             sys.exit(1)
-        files = [target]
+        files: Iterable[Path] = [target]
     elif target.is_dir():
-        files = collect_files(target, extensions)
-        if not files:
+        # Walk lazily so uploads begin before the scan finishes; peek once
+        # to bail out early on an empty tree.
+        walker = collect_files(target, extensions, args.exclude)
+        first = next(walker, None)
+        if first is None:
             console.print("[yellow]No uploadable files found.[/yellow]")
             sys.exit(0)
-        console.print(f"Found [bold]{len(files)}[/bold] files to upload.")
+        files = itertools.chain([first], walker)
     else:
         console.print(f"[red]Error:[/red] Path is not a file or directory: {target}")
         sys.exit(1)
@@ -344,37 +854,21 @@ def cmd_upload(args: argparse.Namespace) -> None:
         "path": str(target),
         "storeName": store_name,
         "smartSync": smart_sync,
-        "totalFiles": len(files),
+        "verify": args.verify,
+        "extensions": sorted(extensions) if extensions else None,
+        "excludes": args.exclude or None,
+        "totalFiles": 0,
         "completedFiles": 0,
         "skippedFiles": 0,
         "failedFiles": 0,
         "failedFilesList": [],
+        "doneFiles": [],
         "startedAt": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
     }
     save_state(state)
 
     console.print(f"Upload operation: [bold]{op_id}[/bold]")
-    result = upload_files(client, files, store_name, smart_sync)
-
-    # Update operation in state
-    state = load_state()
-    op = state["uploadOperations"][op_id]
-    op.update(result)
-    op["status"] = "failed" if result["failedFiles"] == result["totalFiles"] else "completed"
-    op["completedAt"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
-    save_state(state)
-
-    # Summary
-    console.print()
-    console.print(f"[green]Completed:[/green] {result['completedFiles']}")
-    console.print(f"[yellow]Skipped:[/yellow]   {result['skippedFiles']}")
-    console.print(f"[red]Failed:[/red]    {result['failedFiles']}")
-    if result["failedFilesList"]:
-        console.print("[red]Failed files:[/red]")
-        for f in result["failedFilesList"]:
-            console.print(f"  {f['file']}: {f['error']}")
-
-    print(json.dumps({"operationId": op_id, **result}))
+    _run_operation(client, op_id, files, args.concurrency, args.hash_workers)
 
 
 def cmd_status(args: argparse.Namespace) -> None:
@@ -385,7 +879,8 @@ def cmd_status(args: argparse.Namespace) -> None:
     if not op:
         console.print(f"[red]Error:[/red] Operation not found: {args.operation_id}")
         sys.exit(1)
-    print(json.dumps(op, indent=2))
+    # doneFiles is a resume checkpoint; report its size rather than every path.
+    print(json.dumps({**op, "doneFiles": len(op.get("doneFiles", []))}, indent=2))
 
 # ---------------------------------------------------------------------------
 # CLI
@@ -402,15 +897,35 @@ def build_parser() -> argparse.ArgumentParser:
         "--smart-sync", action="store_true",
         help="Skip uploading files that have not changed (hash comparison)",
     )
+    parser.add_argument(
+        "--verify", action="store_true",
+        help="Rehash every file instead of trusting unchanged size/mtime/inode",
+    )
     parser.add_argument(
         "--extensions", nargs="*",
         help="File extensions to include (comma or space separated, e.g. py,ts,md or .py .ts .md)",
     )
+    parser.add_argument(
+        "--exclude", action="append", metavar="PATTERN",
+        help="Skip paths matching a .gitignore-style pattern (repeatable)",
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=DEFAULT_UPLOAD_CONCURRENCY, metavar="N",
+        help=f"Maximum files uploading at once (default: {DEFAULT_UPLOAD_CONCURRENCY})",
+    )
+    parser.add_argument(
+        "--hash-workers", type=int, default=DEFAULT_HASH_WORKERS, metavar="N",
+        help=f"Files hashed in parallel for change detection (default: {DEFAULT_HASH_WORKERS})",
+    )
     parser.add_argument(
         "--status",
         dest="operation_id",
         help="Check status of an upload operation instead of uploading",
     )
+    parser.add_argument(
+        "--resume", metavar="OPERATION_ID",
+        help="Resume an interrupted upload operation, skipping files already uploaded",
+    )
 
     return parser
 
@@ -423,6 +938,10 @@ def main(argv: list[str] | None = None) -> None:
         cmd_status(args)
         return
 
+    if args.resume:
+        cmd_resume(args)
+        return
+
     if not args.path or not args.store_name:
         parser.error("path and store_name are required for upload (or use --status)")
 
@@ -6,14 +6,112 @@
 """食探 (Food Scout) - 每日饮食记录"""
 
 import argparse
+import glob
+import hashlib
+import importlib.util
 import json
 import os
-from datetime import datetime, timedelta
-
-DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+import re
+import sqlite3
+import time
+import uuid
+from bisect import bisect_left
+from collections import deque
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from types import ModuleType
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore[assignment]
+
+DATA_ROOT = os.environ.get('NANOBOTS_FOOD_SCOUT_DATA') or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+
+# Tenant ids that are safe as a directory name are used verbatim; anything
+# else (spaces, slashes, very long ids) is hashed.
+_TENANT_RE = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_.@-]{0,63}$')
+
+
+def _tenant_dir(user: str) -> str:
+    """Data directory for *user*; no user means the single-user layout in DATA_ROOT.
+
+    Duplicated in profile.py (PEP 723 standalone scripts).
+    """
+    if not user:
+        return DATA_ROOT
+    if not _TENANT_RE.match(user):
+        user = 'u-' + hashlib.sha256(user.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(DATA_ROOT, 'users', user)
+
+
+# Everything log.py reads or writes (log store, weight, profile) lives here;
+# the shared food DB stays in DATA_ROOT with nutrition.py.
+DATA_DIR = _tenant_dir(os.environ.get('NANOBOTS_FOOD_SCOUT_USER', ''))
 
 MACRO_KEYS = ('calories', 'protein_g', 'carbs_g', 'fat_g')
 
+# All meals live in one store; `days` holds each date's totals, kept in step
+# with `meals` inside the same transaction, so any window is one range read.
+_LOG_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meals (
+    id INTEGER PRIMARY KEY,
+    date TEXT NOT NULL,
+    type TEXT NOT NULL,
+    time TEXT NOT NULL DEFAULT '',
+    items TEXT NOT NULL DEFAULT '[]',
+    calories REAL NOT NULL DEFAULT 0,
+    protein_g REAL NOT NULL DEFAULT 0,
+    carbs_g REAL NOT NULL DEFAULT 0,
+    fat_g REAL NOT NULL DEFAULT 0,
+    note TEXT NOT NULL DEFAULT '',
+    photo TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS meals_by_date ON meals (date, id);
+CREATE TABLE IF NOT EXISTS days (
+    date TEXT PRIMARY KEY,
+    calories REAL NOT NULL DEFAULT 0,
+    protein_g REAL NOT NULL DEFAULT 0,
+    carbs_g REAL NOT NULL DEFAULT 0,
+    fat_g REAL NOT NULL DEFAULT 0,
+    meal_count INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rollups (
+    period TEXT PRIMARY KEY,
+    calories REAL NOT NULL DEFAULT 0,
+    protein_g REAL NOT NULL DEFAULT 0,
+    carbs_g REAL NOT NULL DEFAULT 0,
+    fat_g REAL NOT NULL DEFAULT 0,
+    meal_count INTEGER NOT NULL DEFAULT 0,
+    active_days INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS photo_cache (
+    digest TEXT PRIMARY KEY,
+    items TEXT NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    last_used REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS photo_cache_lru ON photo_cache (last_used);
+"""
+
+# Resolved item lists kept per photo digest, least recently used evicted first.
+PHOTO_CACHE_MAX = 500
+
+# Bumped when the rollup keys change; a mismatch rebuilds `rollups` from `days`.
+_ROLLUP_VERSION = '1'
+
+# Per-day smoothing for the weight trend line (the classic 10% moving average);
+# a gap of n days applies 1 - (1 - α)^n so sparse weigh-ins aren't over-damped.
+TREND_ALPHA = 0.1
+
+_LEGACY_LOG_RE = re.compile(r'log-(\d{4}-\d{2}-\d{2})\.json$')
+
 
 def _ensure_data_dir() -> str:
     os.makedirs(DATA_DIR, exist_ok=True)
@@ -24,9 +122,9 @@ def _today_str() -> str:
     return datetime.now().strftime('%Y-%m-%d')
 
 
-def _log_path(date_str: str | None = None) -> str:
+def _log_db_path() -> str:
     _ensure_data_dir()
-    return os.path.join(DATA_DIR, f'log-{date_str or _today_str()}.json')
+    return os.path.join(DATA_DIR, 'food-log.sqlite')
 
 
 def _weight_path() -> str:
@@ -42,59 +140,457 @@ def _load_json(path: str, default: dict) -> dict:
 
 
 def _save_json(path: str, data: dict) -> None:
-    with open(path, 'w', encoding='utf-8') as f:
+    # Temp file + rename, so readers never see a half-written file.
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
         json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+@contextmanager
+def _file_lock(path: str) -> Iterator[None]:
+    """Exclusive advisory lock on ``path + '.lock'`` (duplicated from nutrition.py)."""
+    _ensure_data_dir()
+    with open(path + '.lock', 'a+') as fh:
+        if fcntl is not None:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+# Ids of recently applied spool entries kept per store, so a spool that
+# survived a crash between commit and truncation is not replayed.
+_SPOOL_IDS_KEEP = 1000
+
+
+def _remember_ids(applied: list[str], entries: list[dict]) -> list[str]:
+    return (applied + [e['id'] for e in entries if e.get('id')])[-_SPOOL_IDS_KEEP:]
+
+
+def _commit_batched(
+    store: str,
+    entry: dict,
+    apply: Callable[[list[dict]], None],
+    applied_ids: Callable[[], set[str]],
+) -> None:
+    """Queue *entry* for *store*; on return it has been applied.
+
+    Writers append to ``store + '.pending'`` under a short lock, then queue on
+    the store lock.  Whoever holds it applies every pending entry in one
+    write, so meals logged while a write is in flight share the next write
+    instead of each paying for a full read-modify-write.
+
+    Each entry carries an ``id``.  *apply* must record the ids it applies in
+    the same write (see _remember_ids), and *applied_ids* returns them, so
+    entries left in the spool by a crash before truncation are skipped
+    rather than applied twice.  An entry that fails to apply is dropped from
+    the spool; its own caller gets the error.
+    """
+    spool = store + '.pending'
+    entry = {**entry, 'id': uuid.uuid4().hex}
+    with _file_lock(spool):
+        with open(spool, 'ab') as f:
+            f.write(json.dumps(entry, ensure_ascii=False).encode('utf-8') + b'\n')
+
+    with _file_lock(store):
+        with _file_lock(spool):
+            try:
+                with open(spool, 'rb') as f:
+                    pending = f.read()
+            except FileNotFoundError:
+                pending = b''
+        queued = [json.loads(line) for line in pending.splitlines() if line.strip()]
+        if not any(e.get('id') == entry['id'] for e in queued):
+            # An earlier holder took our entry: applied, or dropped as failing.
+            if entry['id'] not in applied_ids():
+                raise RuntimeError('Entry could not be saved')
+            return
+
+        done = applied_ids()
+        todo = [e for e in queued if e.get('id') not in done]
+        error = None
+        try:
+            if todo:
+                apply(todo)
+        except Exception:
+            # Retry one by one so a bad entry can't hold back the rest.
+            for e in todo:
+                try:
+                    apply([e])
+                except Exception as exc:
+                    if e.get('id') == entry['id']:
+                        error = exc
+        # Drop only what was handled; entries appended meanwhile stay queued.
+        with _file_lock(spool):
+            with open(spool, 'r+b') as f:
+                f.seek(len(pending))
+                rest = f.read()
+                f.seek(0)
+                f.write(rest)
+                f.truncate()
+        if error is not None:
+            raise error
 
 
 def _out(data: dict) -> None:
     print(json.dumps(data, ensure_ascii=False, indent=2))
 
 
-def _load_log(date_str: str | None = None) -> dict:
-    ds = date_str or _today_str()
-    return _load_json(_log_path(ds), {'date': ds, 'meals': []})
+def _sum_macros(items: list[dict]) -> dict:
+    return {k: sum(it.get(k, 0) for it in items) for k in MACRO_KEYS}
 
 
-def _save_log(log: dict, date_str: str | None = None) -> None:
-    _save_json(_log_path(date_str), log)
+# ── Log store ────────────────────────────────────────────────────────
 
 
-def _sum_macros(items: list[dict]) -> dict:
-    return {k: sum(it.get(k, 0) for it in items) for k in MACRO_KEYS}
+def _open_log_db() -> sqlite3.Connection:
+    _ensure_data_dir()
+    conn = sqlite3.connect(_log_db_path(), timeout=30)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.executescript(_LOG_SCHEMA)
+    if not _store_ready(conn):
+        # One-time upgrades; the lock keeps concurrent first opens from
+        # importing the legacy files twice.
+        with _file_lock(_log_db_path()):
+            meta = dict(conn.execute('SELECT key, value FROM meta'))
+            if meta.get('rollup_version') != _ROLLUP_VERSION:
+                _rebuild_rollups(conn)
+            if 'legacy_imported' not in meta:
+                _import_legacy_logs(conn)
+    return conn
+
+
+def _spool_applied(conn: sqlite3.Connection) -> list[str]:
+    row = conn.execute("SELECT value FROM meta WHERE key = 'spool_applied'").fetchone()
+    return json.loads(row[0]) if row else []
+
+
+def _store_ready(conn: sqlite3.Connection) -> bool:
+    meta = dict(conn.execute('SELECT key, value FROM meta'))
+    return meta.get('rollup_version') == _ROLLUP_VERSION and 'legacy_imported' in meta
+
+
+def _import_legacy_logs(conn: sqlite3.Connection) -> None:
+    """One-shot import of the old per-day log-YYYY-MM-DD.json files.
+
+    The files are left in place; the meta flag keeps them from being read again.
+    """
+    with conn:
+        for path in sorted(glob.glob(os.path.join(DATA_DIR, 'log-*.json'))):
+            m = _LEGACY_LOG_RE.search(os.path.basename(path))
+            if not m:
+                continue
+            for meal in _load_json(path, {}).get('meals', []):
+                _insert_meal(conn, m.group(1), meal)
+        conn.execute("INSERT INTO meta (key, value) VALUES ('legacy_imported', ?)",
+                     (datetime.now().isoformat(timespec='seconds'),))
+
+
+def _insert_meal(conn: sqlite3.Connection, date_str: str, meal: dict) -> None:
+    totals = meal.get('totals') or _sum_macros(meal.get('items', []))
+    macros = [totals.get(k, 0) for k in MACRO_KEYS]
+    conn.execute(
+        'INSERT INTO meals (date, type, time, items, calories, protein_g, carbs_g, fat_g, note, photo)'
+        ' VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        (date_str, meal.get('type', ''), meal.get('time', ''),
+         json.dumps(meal.get('items', []), ensure_ascii=False), *macros,
+         meal.get('note', ''), meal.get('photo', '')),
+    )
+    _bump_day(conn, date_str, macros, 1)
+
+
+def _periods(date_str: str) -> tuple[str, str]:
+    """Rollup keys for a date: ISO week (2026-W07) and month (2026-02)."""
+    year, week, _ = date.fromisoformat(date_str).isocalendar()
+    return f'{year}-W{week:02d}', date_str[:7]
+
+
+def _bump(conn: sqlite3.Connection, table: str, key_col: str, key: str,
+          macros: list, count: int, extra: dict | None = None) -> None:
+    # ROUND keeps repeated add/subtract from accumulating float noise.
+    cols = [key_col, *MACRO_KEYS, 'meal_count', *(extra or {})]
+    values = [key, *macros, count, *(extra or {}).values()]
+    updates = [f'{k} = ROUND({k} + excluded.{k}, 2)' for k in MACRO_KEYS]
+    updates += [f'{k} = {k} + excluded.{k}' for k in ['meal_count', *(extra or {})]]
+    conn.execute(
+        f'INSERT INTO {table} ({", ".join(cols)}) VALUES ({", ".join("?" * len(cols))})'
+        f' ON CONFLICT({key_col}) DO UPDATE SET {", ".join(updates)}',
+        values,
+    )
+    conn.execute(f'DELETE FROM {table} WHERE {key_col} = ? AND meal_count <= 0', (key,))
+
+
+def _bump_day(conn: sqlite3.Connection, date_str: str, macros: list, count: int) -> None:
+    """Apply a meal delta to the day's totals and its week/month rollups."""
+    row = conn.execute('SELECT meal_count FROM days WHERE date = ?', (date_str,)).fetchone()
+    before = row[0] if row else 0
+    active = int(before + count > 0) - int(before > 0)
+    _bump(conn, 'days', 'date', date_str, macros, count)
+    for period in _periods(date_str):
+        _bump(conn, 'rollups', 'period', period, macros, count, {'active_days': active})
+
+
+def _rebuild_rollups(conn: sqlite3.Connection) -> None:
+    with conn:
+        conn.execute('DELETE FROM rollups')
+        for r in conn.execute(
+            'SELECT date, calories, protein_g, carbs_g, fat_g, meal_count FROM days'
+        ).fetchall():
+            for period in _periods(r[0]):
+                _bump(conn, 'rollups', 'period', period, list(r[1:5]), r[5], {'active_days': 1})
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('rollup_version', ?)",
+                     (_ROLLUP_VERSION,))
+
+
+def _delete_meal(conn: sqlite3.Connection, date_str: str, index: int) -> dict | None:
+    row = conn.execute(
+        'SELECT id, type, note, calories, protein_g, carbs_g, fat_g FROM meals'
+        ' WHERE date = ? ORDER BY id LIMIT 1 OFFSET ?',
+        (date_str, index),
+    ).fetchone()
+    if row is None:
+        return None
+    conn.execute('DELETE FROM meals WHERE id = ?', (row[0],))
+    _bump_day(conn, date_str, [-v for v in row[3:]], -1)
+    return {'type': row[1], 'note': row[2]}
+
+
+def _load_log(conn: sqlite3.Connection, date_str: str | None = None) -> dict:
+    ds = date_str or _today_str()
+    rows = conn.execute(
+        'SELECT type, time, items, calories, protein_g, carbs_g, fat_g, note, photo'
+        ' FROM meals WHERE date = ? ORDER BY id',
+        (ds,),
+    ).fetchall()
+    return {'date': ds, 'meals': [
+        {
+            'type': r[0],
+            'time': r[1],
+            'items': json.loads(r[2]),
+            'totals': dict(zip(MACRO_KEYS, r[3:7])),
+            'note': r[7],
+            'photo': r[8],
+        }
+        for r in rows
+    ]}
+
+
+def _totals_row(row: tuple | None) -> dict:
+    if row is None:
+        return {**{k: 0 for k in MACRO_KEYS}, 'meal_count': 0}
+    totals = {k: round(v, 1) for k, v in zip(MACRO_KEYS, row)}
+    totals['meal_count'] = row[len(MACRO_KEYS)]
+    return totals
+
+
+def _day_totals(conn: sqlite3.Connection, date_str: str | None = None) -> dict:
+    row = conn.execute(
+        'SELECT calories, protein_g, carbs_g, fat_g, meal_count FROM days WHERE date = ?',
+        (date_str or _today_str(),),
+    ).fetchone()
+    return _totals_row(row)
+
+
+def _rollup(conn: sqlite3.Connection, period: str) -> dict:
+    row = conn.execute(
+        'SELECT calories, protein_g, carbs_g, fat_g, meal_count, active_days FROM rollups'
+        ' WHERE period = ?',
+        (period,),
+    ).fetchone()
+    totals = _totals_row(row[:5] if row else None)
+    totals['active_days'] = row[5] if row else 0
+    return totals
+
+
+def _iter_days(conn: sqlite3.Connection, start: str, end: str):
+    """Stream (date, totals) for logged days in start..end (inclusive), in date order."""
+    rows = conn.execute(
+        'SELECT date, calories, protein_g, carbs_g, fat_g, meal_count FROM days'
+        ' WHERE date BETWEEN ? AND ? ORDER BY date',
+        (start, end),
+    )
+    for r in rows:
+        yield r[0], _totals_row(r[1:])
+
+
+def _days_between(conn: sqlite3.Connection, start: str, end: str) -> dict[str, dict]:
+    """Per-day totals for start..end (inclusive) in one range read; empty days are absent."""
+    return dict(_iter_days(conn, start, end))
+
+
+def _percentiles(values: list[float], qs=(10, 25, 50, 75, 90)) -> dict:
+    if not values:
+        return {}
+    ordered = sorted(values)
+    result = {}
+    for q in qs:
+        pos = (len(ordered) - 1) * q / 100
+        lo = int(pos)
+        hi = min(lo + 1, len(ordered) - 1)
+        result[f'p{q}'] = round(ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo), 1)
+    return result
+
+
+def _profile_module() -> ModuleType:
+    # profile.py is a standalone script (and `profile` shadows the stdlib
+    # module), so load it by path and point it at this data directory.
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'profile.py')
+    spec = importlib.util.spec_from_file_location('food_scout_profile', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.DATA_DIR = DATA_DIR
+    return module
+
+
+def _tdee() -> int | None:
+    mod = _profile_module()
+    profile = mod.load_profile()
+    return mod.calc_expenditure(profile)['tdee'] if profile else None
+
+
+# ── Photo cache ──────────────────────────────────────────────────────
+
+
+def _photo_cache_max() -> int:
+    """Photo cache size cap (NANOBOTS_FOOD_SCOUT_PHOTO_CACHE_MAX)."""
+    try:
+        return max(1, int(os.environ.get('NANOBOTS_FOOD_SCOUT_PHOTO_CACHE_MAX', PHOTO_CACHE_MAX)))
+    except ValueError:
+        return PHOTO_CACHE_MAX
+
+
+def _photo_digest(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _photo_get(conn: sqlite3.Connection, digest: str) -> list[dict] | None:
+    with conn:
+        row = conn.execute('SELECT items FROM photo_cache WHERE digest = ?', (digest,)).fetchone()
+        if row is None:
+            return None
+        conn.execute('UPDATE photo_cache SET hits = hits + 1, last_used = ? WHERE digest = ?',
+                     (time.time(), digest))
+    return json.loads(row[0])
+
+
+def _photo_put(conn: sqlite3.Connection, digest: str, items: list[dict]) -> None:
+    with conn:
+        conn.execute(
+            'INSERT INTO photo_cache (digest, items, last_used) VALUES (?, ?, ?)'
+            ' ON CONFLICT(digest) DO UPDATE SET items = excluded.items, last_used = excluded.last_used',
+            (digest, json.dumps(items, ensure_ascii=False), time.time()),
+        )
+        conn.execute(
+            'DELETE FROM photo_cache WHERE digest IN'
+            ' (SELECT digest FROM photo_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)',
+            (_photo_cache_max(),),
+        )
+
+
+# ── Weight trend ─────────────────────────────────────────────────────
+
+
+def _apply_trend(records: list[dict], start: int) -> None:
+    """Recompute trend (kg) and rate (kg/day) for records[start:] from records[start - 1]."""
+    for i in range(start, len(records)):
+        r = records[i]
+        if i == 0:
+            r['trend'], r['rate'] = r['kg'], 0.0
+            continue
+        prev = records[i - 1]
+        gap = max((date.fromisoformat(r['date']) - date.fromisoformat(prev['date'])).days, 1)
+        a = 1 - (1 - TREND_ALPHA) ** gap
+        trend = prev['trend'] + a * (r['kg'] - prev['trend'])
+        slope = (trend - prev['trend']) / gap
+        r['trend'] = round(trend, 3)
+        r['rate'] = round(prev['rate'] + a * (slope - prev['rate']), 4)
+
+
+def _load_weights() -> dict:
+    data = _load_json(_weight_path(), {'records': []})
+    records = data.setdefault('records', [])
+    # Files written before the trend fields existed may be unsorted too.
+    if records and any('trend' not in r for r in records):
+        records.sort(key=lambda r: r['date'])
+        _apply_trend(records, 0)
+    return data
+
+
+def _upsert_weight(records: list[dict], ds: str, kg: float) -> int:
+    """Insert or replace the record for *ds*; only later trend points are recomputed."""
+    idx = bisect_left(records, ds, key=lambda r: r['date'])
+    if idx < len(records) and records[idx]['date'] == ds:
+        records[idx]['kg'] = kg
+    else:
+        records.insert(idx, {'date': ds, 'kg': kg})
+    _apply_trend(records, idx)
+    return idx
 
 
-def _day_totals(log: dict) -> dict:
-    meals = log.get('meals', [])
-    combined = {k: 0 for k in MACRO_KEYS}
-    for meal in meals:
-        for k in MACRO_KEYS:
-            combined[k] += meal.get('totals', {}).get(k, 0)
-    combined['meal_count'] = len(meals)
-    return combined
+def _trend_summary(record: dict) -> dict:
+    return {'trend_kg': round(record['trend'], 1), 'rate_kg_per_week': round(record['rate'] * 7, 2)}
 
 
 # ── Commands ─────────────────────────────────────────────────────────
 
 
 def cmd_add(args: argparse.Namespace) -> None:
-    log = _load_log()
-    items = json.loads(args.items) if args.items else []
+    digest = ''
+    if args.photo:
+        try:
+            digest = _photo_digest(args.photo)
+        except OSError:
+            pass  # the photo is only a reference; it may not be readable here
+
+    conn = _open_log_db()
+    cached = False
+    if args.items:
+        items = json.loads(args.items)
+    elif digest and (hit := _photo_get(conn, digest)) is not None:
+        items, cached = hit, True
+    else:
+        conn.close()
+        _out({'status': 'error', 'message': 'No --items given and the photo has not been logged before'})
+        return
     totals = _sum_macros(items)
 
-    log['meals'].append({
+    def applied_ids() -> set[str]:
+        return set(_spool_applied(conn))
+
+    def apply(entries: list[dict]) -> None:
+        with conn:
+            for e in entries:
+                _insert_meal(conn, e['date'], e['meal'])
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('spool_applied', ?)",
+                (json.dumps(_remember_ids(_spool_applied(conn), entries)),),
+            )
+
+    _commit_batched(_log_db_path(), {'date': _today_str(), 'meal': {
         'type': args.meal,
         'time': datetime.now().strftime('%H:%M'),
         'items': items,
         'totals': totals,
         'note': args.note or '',
         'photo': args.photo or '',
-    })
-    _save_log(log)
+    }}, apply, applied_ids)
+    if digest and not cached:
+        _photo_put(conn, digest, items)
+    day = _day_totals(conn)
+    conn.close()
 
-    day = _day_totals(log)
     _out({
         'status': 'ok',
         'meal': args.meal,
+        'from_photo_cache': cached,
         'meal_calories': totals['calories'],
         'meal_protein': totals['protein_g'],
         'day_so_far': {
@@ -107,8 +603,26 @@ def cmd_add(args: argparse.Namespace) -> None:
     })
 
 
+def cmd_photo(args: argparse.Namespace) -> None:
+    try:
+        digest = _photo_digest(args.photo)
+    except OSError as e:
+        _out({'status': 'error', 'message': f'Cannot read photo: {e}'})
+        return
+    conn = _open_log_db()
+    items = _photo_get(conn, digest)
+    conn.close()
+    if items is None:
+        _out({'status': 'miss', 'digest': digest})
+        return
+    _out({'status': 'hit', 'digest': digest, 'items': items, 'totals': _sum_macros(items)})
+
+
 def cmd_today(_args: argparse.Namespace) -> None:
-    log = _load_log()
+    conn = _open_log_db()
+    log = _load_log(conn)
+    totals = _day_totals(conn)
+    conn.close()
     _out({
         'date': log.get('date', _today_str()),
         'meals': [
@@ -124,15 +638,20 @@ def cmd_today(_args: argparse.Namespace) -> None:
             }
             for m in log.get('meals', [])
         ],
-        'totals': _day_totals(log),
+        'totals': totals,
     })
 
 
 def cmd_week(_args: argparse.Namespace) -> None:
+    start = (datetime.now() - timedelta(days=6)).strftime('%Y-%m-%d')
+    conn = _open_log_db()
+    stored = _days_between(conn, start, _today_str())
+    conn.close()
+
     days = []
     for i in range(7):
         ds = (datetime.now() - timedelta(days=6 - i)).strftime('%Y-%m-%d')
-        totals = _day_totals(_load_log(ds))
+        totals = stored.get(ds) or _totals_row(None)
         days.append({
             'date': ds,
             'calories': totals['calories'],
@@ -154,39 +673,161 @@ def cmd_week(_args: argparse.Namespace) -> None:
     })
 
 
+def cmd_summary(args: argparse.Namespace) -> None:
+    ds = args.date or _today_str()
+    try:
+        week, month = _periods(ds)
+    except ValueError:
+        _out({'status': 'error', 'message': f'Invalid date: {ds} (expected YYYY-MM-DD)'})
+        return
+
+    conn = _open_log_db()
+    if args.period == 'day':
+        key, totals = ds, _day_totals(conn, ds)
+        totals['active_days'] = int(totals['meal_count'] > 0)
+    else:
+        key = week if args.period == 'week' else month
+        totals = _rollup(conn, key)
+    conn.close()
+
+    active = totals['active_days']
+    _out({
+        'period': args.period,
+        'key': key,
+        'totals': totals,
+        'avg_daily_calories': round(totals['calories'] / active) if active else 0,
+    })
+
+
+def cmd_range(args: argparse.Namespace) -> None:
+    if args.days < 1 or args.window < 1:
+        _out({'status': 'error', 'message': '--days and --window must be at least 1'})
+        return
+    end = args.end or _today_str()
+    try:
+        end_date = date.fromisoformat(end)
+        start = args.start or (end_date - timedelta(days=args.days - 1)).isoformat()
+        start_date = date.fromisoformat(start)
+    except ValueError:
+        _out({'status': 'error', 'message': 'Dates must be YYYY-MM-DD'})
+        return
+    if start_date > end_date:
+        _out({'status': 'error', 'message': f'Start {start} is after end {end}'})
+        return
+
+    tdee = _tdee()
+    band = args.band / 100
+    window: deque = deque()
+    window_sum = 0.0
+    sums = {k: 0.0 for k in MACRO_KEYS}
+    calories: list[float] = []
+    protein: list[float] = []
+    series = []
+    within = under = over = 0
+    ratio_sum = 0.0
+
+    # One pass over the day rows: running sums, a trailing calendar-window
+    # moving average and TDEE adherence; only percentiles need the values kept.
+    conn = _open_log_db()
+    for ds, totals in _iter_days(conn, start, end):
+        day = date.fromisoformat(ds)
+        cal = totals['calories']
+        window.append((day, cal))
+        window_sum += cal
+        while window[0][0] <= day - timedelta(days=args.window):
+            window_sum -= window.popleft()[1]
+
+        for k in MACRO_KEYS:
+            sums[k] += totals[k]
+        calories.append(cal)
+        protein.append(totals['protein_g'])
+
+        entry = {
+            'date': ds,
+            **{k: totals[k] for k in MACRO_KEYS},
+            'meals': totals['meal_count'],
+            'moving_avg_calories': round(window_sum / len(window), 1),
+        }
+        if tdee:
+            ratio = cal / tdee
+            ratio_sum += ratio
+            if ratio < 1 - band:
+                under += 1
+            elif ratio > 1 + band:
+                over += 1
+            else:
+                within += 1
+            entry['tdee_ratio'] = round(ratio, 2)
+        series.append(entry)
+    conn.close()
+
+    logged = len(series)
+    result: dict = {
+        'start': start,
+        'end': end,
+        'days_in_range': (end_date - start_date).days + 1,
+        'logged_days': logged,
+        'window_days': args.window,
+        'averages': {k: round(v / logged, 1) if logged else 0 for k, v in sums.items()},
+        'percentiles': {
+            'calories': _percentiles(calories),
+            'protein_g': _percentiles(protein),
+        },
+        'series': series,
+    }
+    if tdee:
+        result['adherence'] = {
+            'tdee': tdee,
+            'band_pct': args.band,
+            'within': within,
+            'under': under,
+            'over': over,
+            'within_pct': round(100 * within / logged, 1) if logged else 0,
+            'mean_ratio': round(ratio_sum / logged, 2) if logged else 0,
+        }
+    _out(result)
+
+
 def cmd_delete(args: argparse.Namespace) -> None:
-    log = _load_log()
-    meals = log.get('meals', [])
     idx = args.index
-
-    if not (0 <= idx < len(meals)):
-        _out({'status': 'error', 'message': f'Index {idx} out of range (0-{len(meals) - 1})'})
+    conn = _open_log_db()
+    with _file_lock(_log_db_path()), conn:
+        removed = _delete_meal(conn, _today_str(), idx) if idx >= 0 else None
+        count = _day_totals(conn)['meal_count']
+    conn.close()
+
+    if removed is None:
+        _out({'status': 'error', 'message': f'Index {idx} out of range (0-{count - 1})'})
         return
 
-    removed = meals.pop(idx)
-    _save_log(log)
-    _out({'status': 'ok', 'removed': removed.get('type', ''), 'note': removed.get('note', '')})
+    _out({'status': 'ok', 'removed': removed['type'], 'note': removed['note']})
 
 
 def cmd_weight(args: argparse.Namespace) -> None:
-    data = _load_json(_weight_path(), {'records': []})
-    today = _today_str()
-    records: list[dict] = data['records']
+    today = args.date or _today_str()
+    try:
+        date.fromisoformat(today)
+    except ValueError:
+        _out({'status': 'error', 'message': f'Invalid date: {today} (expected YYYY-MM-DD)'})
+        return
 
-    # Update existing or append new
-    existing = next((r for r in records if r['date'] == today), None)
-    if existing:
-        existing['kg'] = args.kg
-    else:
-        records.append({'date': today, 'kg': args.kg})
+    def applied_ids() -> set[str]:
+        return set(_load_json(_weight_path(), {}).get('spool_applied', []))
 
-    records.sort(key=lambda r: r['date'])
-    _save_json(_weight_path(), data)
+    def apply(entries: list[dict]) -> None:
+        data = _load_weights()
+        for e in entries:
+            _upsert_weight(data['records'], e['date'], e['kg'])
+        data['spool_applied'] = _remember_ids(data.get('spool_applied', []), entries)
+        _save_json(_weight_path(), data)
 
-    result: dict = {'status': 'ok', 'date': today, 'kg': args.kg}
+    _commit_batched(_weight_path(), {'date': today, 'kg': args.kg}, apply, applied_ids)
+    records: list[dict] = _load_weights()['records']
+    today_idx = bisect_left(records, today, key=lambda r: r['date'])
+
+    result: dict = {'status': 'ok', 'date': today, 'kg': args.kg, **_trend_summary(records[-1])}
 
     # Compare with previous record
-    today_idx = next(i for i, r in enumerate(records) if r['date'] == today)
     if today_idx > 0:
         prev = records[today_idx - 1]
         result['prev_date'] = prev['date']
@@ -197,8 +838,7 @@ def cmd_weight(args: argparse.Namespace) -> None:
 
 
 def cmd_weight_trend(_args: argparse.Namespace) -> None:
-    data = _load_json(_weight_path(), {'records': []})
-    records: list[dict] = data.get('records', [])
+    records: list[dict] = _load_weights()['records']
 
     if not records:
         _out({'status': 'ok', 'message': 'No weight records yet'})
@@ -209,13 +849,14 @@ def cmd_weight_trend(_args: argparse.Namespace) -> None:
         'first': records[0],
         'latest': records[-1],
         'records': records[-10:],
+        **_trend_summary(records[-1]),
     }
 
     if len(records) >= 2:
         result['total_change'] = round(records[-1]['kg'] - records[0]['kg'], 1)
 
         cutoff = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
-        recent = [r for r in records if r['date'] >= cutoff]
+        recent = records[bisect_left(records, cutoff, key=lambda r: r['date']):]
         if recent:
             result['month_avg'] = round(sum(r['kg'] for r in recent) / len(recent), 1)
 
@@ -230,7 +871,10 @@ def cmd_weight_trend(_args: argparse.Namespace) -> None:
 COMMANDS = {
     'add': cmd_add,
     'today': cmd_today,
+    'photo': cmd_photo,
     'week': cmd_week,
+    'summary': cmd_summary,
+    'range': cmd_range,
     'delete': cmd_delete,
     'weight': cmd_weight,
     'weight-trend': cmd_weight_trend,
@@ -239,27 +883,48 @@ COMMANDS = {
 
 def main() -> None:
     parser = argparse.ArgumentParser(description='食探 - 饮食记录')
+    parser.add_argument('--user', default=None,
+                        help='tenant id (default: NANOBOTS_FOOD_SCOUT_USER, else single-user)')
     sub = parser.add_subparsers(dest='cmd')
 
     p_add = sub.add_parser('add')
     p_add.add_argument('--meal', required=True,
                        choices=['breakfast', 'lunch', 'dinner', 'snack'])
-    p_add.add_argument('--items', required=True, help='JSON array of food items')
+    p_add.add_argument('--items', default='',
+                       help='JSON array of food items (optional when --photo was logged before)')
     p_add.add_argument('--note', default='')
     p_add.add_argument('--photo', default='')
 
     sub.add_parser('today')
+
+    p_photo = sub.add_parser('photo')
+    p_photo.add_argument('--photo', required=True, help='photo path; prints cached items if seen before')
     sub.add_parser('week')
 
+    p_sum = sub.add_parser('summary')
+    p_sum.add_argument('--period', default='week', choices=['day', 'week', 'month'])
+    p_sum.add_argument('--date', default='', help='YYYY-MM-DD within the period (default today)')
+
+    p_rng = sub.add_parser('range')
+    p_rng.add_argument('--start', default='', help='YYYY-MM-DD (default: --days before --end)')
+    p_rng.add_argument('--end', default='', help='YYYY-MM-DD (default today)')
+    p_rng.add_argument('--days', type=int, default=30)
+    p_rng.add_argument('--window', type=int, default=7, help='moving-average window in days')
+    p_rng.add_argument('--band', type=float, default=10, help='TDEE adherence band (±%%)')
+
     p_del = sub.add_parser('delete')
     p_del.add_argument('--index', type=int, required=True)
 
     p_wt = sub.add_parser('weight')
     p_wt.add_argument('--kg', type=float, required=True)
+    p_wt.add_argument('--date', default='', help='YYYY-MM-DD for a backfilled weigh-in (default today)')
 
     sub.add_parser('weight-trend')
 
     args = parser.parse_args()
+    if args.user is not None:
+        global DATA_DIR
+        DATA_DIR = _tenant_dir(args.user)
     handler = COMMANDS.get(args.cmd)
     if handler:
         handler(args)
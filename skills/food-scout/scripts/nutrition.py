@@ -15,23 +15,66 @@ All nutritional values are per 100g unless scaled by a serving size in a query.
 from __future__ import annotations
 
 import argparse
+import csv
+import io
 import json
 import os
+import random
 import re
+import signal
+import socket
+import socketserver
+import sqlite3
 import sys
-from datetime import date
-from typing import Any
-
-import requests
+import threading
+import time
+import zipfile
+from array import array
+from bisect import bisect_left
+from collections.abc import Callable, Iterable, Iterator, MutableMapping, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from datetime import date, datetime
+from email.utils import parsedate_to_datetime
+from typing import IO, TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    import requests
+
+try:
+    import fcntl
+except ImportError:  # Windows: advisory locks are skipped.
+    fcntl = None  # type: ignore[assignment]
 
 # ---------------------------------------------------------------------------
 # Paths
 # ---------------------------------------------------------------------------
 
-DATA_DIR = os.path.join(
+# The food DB, API cache and rate limiter are shared by every user of an
+# installation; per-user logs and profiles live under DATA_DIR/users/<id>
+# (see log.py / profile.py).  NANOBOTS_FOOD_SCOUT_DATA moves the whole tree.
+DATA_DIR = os.environ.get("NANOBOTS_FOOD_SCOUT_DATA") or os.path.join(
     os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data"
 )
 DB_PATH = os.path.join(DATA_DIR, "food-db.json")
+INDEX_PATH = os.path.join(DATA_DIR, "food-index.json")
+SQLITE_PATH = os.path.join(DATA_DIR, "food-db.sqlite")
+API_CACHE_PATH = os.path.join(DATA_DIR, "api-cache.json")
+
+# USDA response cache: found foods rarely change, "not found" is rechecked
+# sooner in case the dataset gains the item.
+API_CACHE_TTL = 30 * 86400
+API_CACHE_NEGATIVE_TTL = 7 * 86400
+API_CACHE_MAX_ENTRIES = 5000
+
+API_SEARCH_URL = "https://api.nal.usda.gov/fdc/v1/foods/search"
+RATE_LIMIT_PATH = os.path.join(DATA_DIR, "api-ratelimit.json")
+
+# api.data.gov hourly quotas per key tier.
+API_RATE_LIMITS = {"demo": 30, "registered": 1000}
+API_MAX_RETRIES = 3
+API_BACKOFF_BASE = 1.0
+API_BACKOFF_CAP = 30.0
 
 # ---------------------------------------------------------------------------
 # Built-in foods (~80 common Chinese foods, values per 100 g)
@@ -676,6 +719,24 @@ def _ensure_data_dir() -> None:
     os.makedirs(DATA_DIR, exist_ok=True)
 
 
+@contextmanager
+def _file_lock(path: str) -> Iterator[None]:
+    """Hold an exclusive advisory lock on ``path + ".lock"``.
+
+    Serializes read-modify-write cycles across nutrition.py processes (and
+    threads, since each call opens its own file description).
+    """
+    _ensure_data_dir()
+    with open(path + ".lock", "a+") as fh:
+        if fcntl is not None:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+
 def _today() -> str:
     """Return today's date as an ISO-format string."""
     return date.today().isoformat()
@@ -693,15 +754,40 @@ def load_db() -> dict[str, Any]:
     """
     _ensure_data_dir()
 
+    if _backend() == "sqlite":
+        return _load_sqlite_db()
+
+    json_db = _load_json_db()
+    if json_db is not None:
+        return json_db
+
+    # First run: seed from built-in data.
+    db: dict[str, Any] = {"version": "1.0", "foods": _seed_foods()}
+    _save_db(db)
+    return db
+
+
+def _load_json_db() -> dict[str, Any] | None:
+    """Parse the JSON database file, or return None if missing or corrupt.
+
+    The file's signature at load time is kept under ``_signature`` so
+    :func:`_save_db` can tell whether another process has written since.
+    """
     if os.path.exists(DB_PATH):
+        signature = _db_signature()
         try:
             with open(DB_PATH, "r", encoding="utf-8") as fh:
-                return json.load(fh)
+                db = json.load(fh)
+            db["_signature"] = signature
+            return db
         except (json.JSONDecodeError, OSError):
-            # Corrupted file -- fall through and re-initialize.
+            # Corrupted file -- caller re-initializes.
             pass
+    return None
 
-    # First run: seed from built-in data.
+
+def _seed_foods() -> dict[str, dict[str, Any]]:
+    """Return the BUILTIN_FOODS entries in database format."""
     today = _today()
     foods: dict[str, dict[str, Any]] = {}
     for key, entry in BUILTIN_FOODS.items():
@@ -714,25 +800,65 @@ def load_db() -> dict[str, Any]:
             "source": "builtin",
             "added_at": today,
         }
-
-    db: dict[str, Any] = {"version": "1.0", "foods": foods}
-    _save_db(db)
-    return db
+    return foods
 
 
 def _save_db(db: dict[str, Any]) -> None:
     """Persist the database to disk atomically.
 
     Writes to a temporary file first, then renames to avoid partial writes.
+    The SQLite backend has already written each change in place, so saving
+    only commits the open transaction.
+
+    The JSON file is rewritten under a file lock.  If another process saved
+    since *db* was loaded, its foods are merged in first and only the keys
+    this process learned (``_pending``) are re-applied on top, so parallel
+    lookups never drop each other's learned foods.
     """
+    if db.get("_backend") == "sqlite":
+        db["_conn"].commit()
+        db.pop("_pending", None)
+        return
+
     _ensure_data_dir()
-    tmp_path = DB_PATH + ".tmp"
+    with _file_lock(DB_PATH):
+        index = db.get("_index")
+        if db.get("_signature") != _db_signature():
+            disk = _load_json_db()
+            if disk is not None:
+                foods = disk.get("foods", {})
+                for key in db.get("_pending", ()):
+                    foods[key] = db["foods"][key]
+                db["foods"] = foods
+                # Rebuild so index ordinals follow the merged file order.
+                if index is not None:
+                    index = db["_index"] = FoodIndex.build(foods)
+
+        # Underscore-prefixed keys hold in-memory helpers (e.g. the search
+        # index) and are never written to the database file.
+        _write_json_atomic(
+            DB_PATH,
+            {k: v for k, v in db.items() if not k.startswith("_")},
+            indent=2,
+        )
+        db["_signature"] = _db_signature()
+        db.pop("_pending", None)
+
+        if index is not None:
+            index.signature = db["_signature"]
+            _save_index(index)
+
+
+def _write_json_atomic(path: str, data: Any, indent: int | None = None) -> None:
+    """Write *data* as JSON to *path* via a temp file and an atomic rename."""
+    tmp_path = path + ".tmp"
+    separators = None if indent else (",", ":")
     try:
         with open(tmp_path, "w", encoding="utf-8") as fh:
-            json.dump(db, fh, ensure_ascii=False, indent=2)
+            json.dump(data, fh, ensure_ascii=False, indent=indent, separators=separators)
         # Atomic rename (works on POSIX; on Windows it replaces as well in
         # Python 3.3+).
-        os.replace(tmp_path, DB_PATH)
+        os.replace(tmp_path, path)
     except OSError:
         # Best-effort cleanup of the temp file.
         try:
@@ -745,9 +871,541 @@ def _save_db(db: dict[str, Any]) -> None:
 def _db_stats(db: dict[str, Any]) -> dict[str, int]:
     """Return aggregate statistics about the database."""
     foods = db.get("foods", {})
+    if isinstance(foods, SqliteFoods):
+        return foods.stats()
     builtin = sum(1 for f in foods.values() if f.get("source") == "builtin")
-    learned = sum(1 for f in foods.values() if f.get("source") != "builtin")
-    return {"total": len(foods), "builtin": builtin, "learned": learned}
+    imported = sum(1 for f in foods.values() if f.get("source") == "usda")
+    return {
+        "total": len(foods),
+        "builtin": builtin,
+        "imported": imported,
+        "learned": len(foods) - builtin - imported,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Inverted n-gram index
+# ---------------------------------------------------------------------------
+
+
+def _grams(text: str) -> set[str]:
+    """Return the character unigrams and bigrams of *text*."""
+    grams = set(text)
+    grams.update(text[i : i + 2] for i in range(len(text) - 1))
+    return grams
+
+
+class FoodIndex:
+    """Character/bigram inverted index over English keys and Chinese names.
+
+    Each key gets an ordinal in DB insertion order, and every unigram and
+    bigram of the key and its ``name_cn`` maps to a sorted posting list of
+    ordinals.  A substring query only touches the posting lists of its own
+    grams, so lookup cost tracks the number of candidates rather than the
+    size of the DB.
+    """
+
+    def __init__(
+        self,
+        keys: list[str] | None = None,
+        postings: dict[str, list[int]] | None = None,
+        signature: str | None = None,
+    ) -> None:
+        self.keys: list[str] = keys or []
+        self.ordinals: dict[str, int] = {k: i for i, k in enumerate(self.keys)}
+        self.postings: dict[str, list[int]] = postings or {}
+        self.signature = signature
+        self.max_key_len = max((len(k) for k in self.keys), default=0)
+
+    @classmethod
+    def build(cls, foods: dict[str, Any]) -> FoodIndex:
+        """Build an index from scratch over every entry in *foods*."""
+        index = cls()
+        for key, entry in foods.items():
+            index.add(key, entry.get("name_cn", ""))
+        return index
+
+    def add(self, key: str, name_cn: str) -> None:
+        """Index *key* (and its Chinese name), keeping posting lists sorted."""
+        ordinal = self.ordinals.get(key)
+        if ordinal is None:
+            ordinal = len(self.keys)
+            self.keys.append(key)
+            self.ordinals[key] = ordinal
+            self.max_key_len = max(self.max_key_len, len(key))
+
+        for gram in _grams(key) | _grams(name_cn):
+            plist = self.postings.setdefault(gram, [])
+            pos = bisect_left(plist, ordinal)
+            if pos == len(plist) or plist[pos] != ordinal:
+                plist.insert(pos, ordinal)
+
+    def candidates(
+        self, fragment: str, foods: dict[str, Any]
+    ) -> list[tuple[str, dict[str, Any]]]:
+        """Return entries that may match *fragment* in either direction.
+
+        Covers keys/names containing the fragment and keys contained in it,
+        in DB order.  The result is a superset; callers verify.
+        """
+        ordinals = self.containing(fragment)
+        for sub in _substrings(fragment, self.max_key_len):
+            ordinal = self.ordinals.get(sub)
+            if ordinal is not None:
+                ordinals.add(ordinal)
+
+        result: list[tuple[str, dict[str, Any]]] = []
+        for ordinal in sorted(ordinals):
+            key = self.keys[ordinal]
+            entry = foods.get(key)
+            if entry is not None:
+                result.append((key, entry))
+        return result
+
+    def containing(self, fragment: str) -> set[int]:
+        """Return ordinals whose key or name_cn may contain *fragment*.
+
+        Uses bigrams when the fragment has at least two characters, otherwise
+        its single character.  The result is a superset; callers verify.
+        """
+        if not fragment:
+            return set(range(len(self.keys)))
+
+        if len(fragment) == 1:
+            grams = [fragment]
+        else:
+            grams = [fragment[i : i + 2] for i in range(len(fragment) - 1)]
+
+        plists = sorted((self.postings.get(g, []) for g in set(grams)), key=len)
+        result = set(plists[0])
+        for plist in plists[1:]:
+            if not result:
+                break
+            result.intersection_update(plist)
+        return result
+
+    def approx_candidates(
+        self, grams: list[str], min_overlap: int, foods: dict[str, Any], limit: int
+    ) -> list[tuple[str, dict[str, Any]]]:
+        """Return up to *limit* entries sharing at least *min_overlap* grams.
+
+        Prefix filtering keeps this cheap on large DBs: any key with enough
+        shared grams must appear in one of the rarest
+        ``len(grams) - min_overlap + 1`` posting lists, so only those are
+        scanned; the rest are probed by binary search per candidate.
+        """
+        plists = sorted((self.postings.get(g, []) for g in grams), key=len)
+        cut = len(plists) - min_overlap + 1
+        counts: dict[int, int] = {}
+        for plist in plists[:cut]:
+            for ordinal in plist:
+                counts[ordinal] = counts.get(ordinal, 0) + 1
+        for plist in plists[cut:]:
+            for ordinal in counts:
+                pos = bisect_left(plist, ordinal)
+                if pos < len(plist) and plist[pos] == ordinal:
+                    counts[ordinal] += 1
+
+        best = sorted(
+            (o for o, c in counts.items() if c >= min_overlap),
+            key=lambda o: (-counts[o], o),
+        )[:limit]
+        result: list[tuple[str, dict[str, Any]]] = []
+        for ordinal in best:
+            entry = foods.get(self.keys[ordinal])
+            if entry is not None:
+                result.append((self.keys[ordinal], entry))
+        return result
+
+    def to_json(self) -> dict[str, Any]:
+        """Serialize the index for :data:`INDEX_PATH`."""
+        return {
+            "signature": self.signature,
+            "keys": self.keys,
+            "postings": self.postings,
+        }
+
+
+def _substrings(text: str, max_len: int) -> Iterator[str]:
+    """Yield every substring of *text* up to *max_len* characters long.
+
+    Probing these against the key table finds keys contained in a query in
+    O(len(query)^2) lookups, independent of DB size.
+    """
+    n = len(text)
+    for i in range(n):
+        for j in range(i + 1, min(n, i + max_len) + 1):
+            yield text[i:j]
+
+
+def _db_signature() -> str | None:
+    """Fingerprint the DB file so a stale persisted index can be detected."""
+    try:
+        st = os.stat(DB_PATH)
+    except OSError:
+        return None
+    return f"{st.st_mtime_ns}:{st.st_size}"
+
+
+def _save_index(index: FoodIndex) -> None:
+    """Persist the index next to the database (best effort)."""
+    try:
+        _write_json_atomic(INDEX_PATH, index.to_json())
+    except OSError:
+        pass
+
+
+def _get_index(db: dict[str, Any]) -> FoodIndex | SqliteIndex:
+    """Return the search index for *db*, loading or rebuilding it as needed.
+
+    The persisted index is reused only when its signature matches the DB
+    file on disk; otherwise it is rebuilt from the foods and written back.
+    """
+    index = db.get("_index")
+    if index is not None:
+        return index
+
+    signature = _db_signature()
+    try:
+        with open(INDEX_PATH, "r", encoding="utf-8") as fh:
+            raw = json.load(fh)
+        if signature is not None and raw.get("signature") == signature:
+            index = FoodIndex(raw["keys"], raw["postings"], signature)
+    except (OSError, ValueError, KeyError, TypeError):
+        index = None
+
+    if index is None:
+        index = FoodIndex.build(db.get("foods", {}))
+        index.signature = signature
+        if signature is not None:
+            _save_index(index)
+
+    db["_index"] = index
+    return index
+
+
+# ---------------------------------------------------------------------------
+# SQLite backend
+# ---------------------------------------------------------------------------
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS foods (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    name_cn TEXT NOT NULL DEFAULT '',
+    calories REAL NOT NULL DEFAULT 0,
+    protein REAL NOT NULL DEFAULT 0,
+    carbs REAL NOT NULL DEFAULT 0,
+    fat REAL NOT NULL DEFAULT 0,
+    source TEXT NOT NULL DEFAULT 'api',
+    added_at TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS food_grams (
+    gram TEXT NOT NULL,
+    food_id INTEGER NOT NULL,
+    PRIMARY KEY (gram, food_id)
+) WITHOUT ROWID;
+"""
+
+_FOOD_COLUMNS = "id, key, name_cn, calories, protein, carbs, fat, source, added_at"
+
+# Keep "key IN (...)" probes well under SQLite's bound-parameter limit.
+_SQLITE_CHUNK = 500
+
+
+def _backend() -> str:
+    """Return the storage backend in use: ``"json"`` or ``"sqlite"``.
+
+    NANOBOTS_FOOD_DB_BACKEND forces a choice; otherwise SQLite is used once
+    the JSON database has been migrated.
+    """
+    choice = os.environ.get("NANOBOTS_FOOD_DB_BACKEND", "").strip().lower()
+    if choice in ("json", "sqlite"):
+        return choice
+    return "sqlite" if os.path.exists(SQLITE_PATH) else "json"
+
+
+def _open_sqlite(path: str) -> sqlite3.Connection:
+    """Open (and create if needed) a SQLite food store at *path*."""
+    # The resident server (cmd_serve) hands the connection to handler
+    # threads; access is serialized by its lock.
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SQLITE_SCHEMA)
+    return conn
+
+
+def _row_entry(row: tuple[Any, ...]) -> tuple[str, dict[str, Any]]:
+    """Convert a ``foods`` row (see _FOOD_COLUMNS) into ``(key, entry)``."""
+    return row[1], {
+        "name_cn": row[2],
+        "calories": row[3],
+        "protein": row[4],
+        "carbs": row[5],
+        "fat": row[6],
+        "source": row[7],
+        "added_at": row[8],
+    }
+
+
+class SqliteFoods(MutableMapping):
+    """Dict-like view of the ``foods`` table with point reads and upserts.
+
+    Stands in for ``db["foods"]`` so the lookup code works unchanged on
+    either backend.  Writes join the connection's open transaction and are
+    committed by :func:`_save_db`.
+    """
+
+    def __init__(self, conn: sqlite3.Connection) -> None:
+        self.conn = conn
+
+    def __getitem__(self, key: str) -> dict[str, Any]:
+        row = self.conn.execute(
+            f"SELECT {_FOOD_COLUMNS} FROM foods WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return _row_entry(row)[1]
+
+    def __setitem__(self, key: str, entry: dict[str, Any]) -> None:
+        self.conn.execute(
+            "INSERT INTO foods (key, name_cn, calories, protein, carbs, fat, source, added_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET name_cn = excluded.name_cn, "
+            "calories = excluded.calories, protein = excluded.protein, "
+            "carbs = excluded.carbs, fat = excluded.fat, "
+            "source = excluded.source, added_at = excluded.added_at",
+            (
+                key,
+                entry.get("name_cn", ""),
+                entry.get("calories", 0),
+                entry.get("protein", 0),
+                entry.get("carbs", 0),
+                entry.get("fat", 0),
+                entry.get("source", "api"),
+                entry.get("added_at", ""),
+            ),
+        )
+
+    def __delitem__(self, key: str) -> None:
+        row = self.conn.execute("SELECT id FROM foods WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            raise KeyError(key)
+        self.conn.execute("DELETE FROM food_grams WHERE food_id = ?", (row[0],))
+        self.conn.execute("DELETE FROM foods WHERE id = ?", (row[0],))
+
+    def __contains__(self, key: object) -> bool:
+        return (
+            self.conn.execute("SELECT 1 FROM foods WHERE key = ?", (key,)).fetchone()
+            is not None
+        )
+
+    def __iter__(self) -> Iterator[str]:
+        for (key,) in self.conn.execute("SELECT key FROM foods ORDER BY id"):
+            yield key
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM foods").fetchone()[0]
+
+    def items(self) -> list[tuple[str, dict[str, Any]]]:  # type: ignore[override]
+        """Return every ``(key, entry)`` pair from a single table scan."""
+        return [
+            _row_entry(row)
+            for row in self.conn.execute(f"SELECT {_FOOD_COLUMNS} FROM foods ORDER BY id")
+        ]
+
+    def stats(self) -> dict[str, int]:
+        """Count foods by source without materializing any entries."""
+        total, builtin, imported = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(source = 'builtin'), 0), "
+            "COALESCE(SUM(source = 'usda'), 0) FROM foods"
+        ).fetchone()
+        return {
+            "total": total,
+            "builtin": builtin,
+            "imported": imported,
+            "learned": total - builtin - imported,
+        }
+
+
+class SqliteIndex:
+    """The :class:`FoodIndex` interface backed by the ``food_grams`` table."""
+
+    def __init__(self, conn: sqlite3.Connection) -> None:
+        self.conn = conn
+
+    @property
+    def max_key_len(self) -> int:
+        row = self.conn.execute(
+            "SELECT value FROM meta WHERE key = 'max_key_len'"
+        ).fetchone()
+        return int(row[0]) if row else 0
+
+    def add_many(self, rows: Iterable[tuple[int, str, str]]) -> None:
+        """Index ``(food_id, key, name_cn)`` rows in bulk (offline builds)."""
+        longest = self.max_key_len
+        batch: list[tuple[str, int]] = []
+        for food_id, key, name_cn in rows:
+            longest = max(longest, len(key))
+            batch.extend((gram, food_id) for gram in _grams(key) | _grams(name_cn))
+            if len(batch) >= 50_000:
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO food_grams (gram, food_id) VALUES (?, ?)", batch
+                )
+                batch.clear()
+        if batch:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO food_grams (gram, food_id) VALUES (?, ?)", batch
+            )
+        self.conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('max_key_len', ?)",
+            (str(longest),),
+        )
+
+    def add(self, key: str, name_cn: str) -> None:
+        """Index *key*, which must already be present in ``foods``."""
+        row = self.conn.execute("SELECT id FROM foods WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO food_grams (gram, food_id) VALUES (?, ?)",
+            ((gram, row[0]) for gram in _grams(key) | _grams(name_cn)),
+        )
+        if len(key) > self.max_key_len:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('max_key_len', ?)",
+                (str(len(key)),),
+            )
+
+    def candidates(
+        self, fragment: str, foods: MutableMapping
+    ) -> list[tuple[str, dict[str, Any]]]:
+        """See :meth:`FoodIndex.candidates`."""
+        if not fragment:
+            return list(foods.items())
+
+        if len(fragment) == 1:
+            grams = [fragment]
+        else:
+            grams = sorted({fragment[i : i + 2] for i in range(len(fragment) - 1)})
+        gram_sql = " INTERSECT ".join(
+            "SELECT food_id FROM food_grams WHERE gram = ?" for _ in grams
+        )
+        rows = {
+            row[0]: row
+            for row in self.conn.execute(
+                f"SELECT {_FOOD_COLUMNS} FROM foods WHERE id IN ({gram_sql})", grams
+            )
+        }
+
+        subs = list(set(_substrings(fragment, self.max_key_len)))
+        for start in range(0, len(subs), _SQLITE_CHUNK):
+            chunk = subs[start : start + _SQLITE_CHUNK]
+            marks = ",".join("?" * len(chunk))
+            for row in self.conn.execute(
+                f"SELECT {_FOOD_COLUMNS} FROM foods WHERE key IN ({marks})", chunk
+            ):
+                rows[row[0]] = row
+
+        return [_row_entry(rows[food_id]) for food_id in sorted(rows)]
+
+    def approx_candidates(
+        self, grams: list[str], min_overlap: int, foods: MutableMapping, limit: int
+    ) -> list[tuple[str, dict[str, Any]]]:
+        """See :meth:`FoodIndex.approx_candidates`."""
+        marks = ",".join("?" * len(grams))
+        sizes = dict(
+            self.conn.execute(
+                f"SELECT gram, COUNT(*) FROM food_grams WHERE gram IN ({marks}) GROUP BY gram",
+                grams,
+            ).fetchall()
+        )
+        rare = sorted(grams, key=lambda g: sizes.get(g, 0))[: len(grams) - min_overlap + 1]
+        rare_marks = ",".join("?" * len(rare))
+        rows = self.conn.execute(
+            f"SELECT {_FOOD_COLUMNS} FROM foods WHERE id IN ("
+            f"  SELECT food_id FROM food_grams"
+            f"  WHERE gram IN ({marks}) AND food_id IN ("
+            f"    SELECT food_id FROM food_grams WHERE gram IN ({rare_marks}))"
+            f"  GROUP BY food_id HAVING COUNT(*) >= ?"
+            f"  ORDER BY COUNT(*) DESC, food_id LIMIT ?)"
+            f" ORDER BY id",
+            [*grams, *rare, min_overlap, limit],
+        ).fetchall()
+        return [_row_entry(row) for row in rows]
+
+
+def _write_sqlite_foods(
+    conn: sqlite3.Connection, foods: dict[str, dict[str, Any]], version: str
+) -> None:
+    """Bulk-insert *foods* and their index grams in one transaction."""
+    store = SqliteFoods(conn)
+    index = SqliteIndex(conn)
+    for key, entry in foods.items():
+        store[key] = entry
+        index.add(key, entry.get("name_cn", ""))
+    conn.execute(
+        "INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)", (version,)
+    )
+    conn.commit()
+
+
+def _load_sqlite_db() -> dict[str, Any]:
+    """Open the SQLite store, migrating or seeding it on first use."""
+    if not os.path.exists(SQLITE_PATH):
+        _migrate_json_to_sqlite()
+
+    conn = _open_sqlite(SQLITE_PATH)
+    row = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+    return {
+        "version": row[0] if row else "1.0",
+        "foods": SqliteFoods(conn),
+        "_backend": "sqlite",
+        "_conn": conn,
+        "_index": SqliteIndex(conn),
+    }
+
+
+def _migrate_json_to_sqlite() -> dict[str, Any]:
+    """Copy the JSON database (or the builtins) into a new SQLite store.
+
+    The store is built under a temporary name and renamed into place, so an
+    interrupted migration never leaves a half-filled database behind.  The
+    JSON file is kept as ``food-db.json.bak``.
+
+    Returns:
+        Summary with the number of migrated foods and the backup path.
+    """
+    _ensure_data_dir()
+    json_db = _load_json_db()
+    if json_db is None:
+        json_db = {"version": "1.0", "foods": _seed_foods()}
+
+    tmp_path = SQLITE_PATH + ".tmp"
+    for stale in (tmp_path, tmp_path + "-wal", tmp_path + "-shm"):
+        if os.path.exists(stale):
+            os.remove(stale)
+
+    conn = _open_sqlite(tmp_path)
+    try:
+        _write_sqlite_foods(conn, json_db.get("foods", {}), json_db.get("version", "1.0"))
+    finally:
+        conn.close()
+    os.replace(tmp_path, SQLITE_PATH)
+
+    backup = None
+    if os.path.exists(DB_PATH):
+        backup = DB_PATH + ".bak"
+        os.replace(DB_PATH, backup)
+    if os.path.exists(INDEX_PATH):
+        os.remove(INDEX_PATH)
+
+    return {"migrated": len(json_db.get("foods", {})), "backup": backup}
 
 
 # ---------------------------------------------------------------------------
@@ -771,28 +1429,130 @@ def _fuzzy_match(
 
     Returns the best (shortest key) match to prefer more specific entries.
     """
-    foods = db.get("foods", {})
-    lower = query.lower().strip()
-    candidates: list[tuple[str, dict[str, Any]]] = []
-
-    for key, entry in foods.items():
-        if lower in key or key in lower:
-            candidates.append((key, entry))
-        elif lower in entry.get("name_cn", ""):
-            candidates.append((key, entry))
-
+    candidates = _substring_matches(db, query.lower().strip())
     if not candidates:
         return None
 
-    # Prefer the shortest key (most specific match).
+    # Prefer the shortest key (most specific match).  The sort is stable and
+    # candidates arrive in DB order, so ties resolve to the earliest entry.
     candidates.sort(key=lambda c: len(c[0]))
     return candidates[0]
 
 
+def _substring_matches(
+    db: dict[str, Any], lower: str
+) -> list[tuple[str, dict[str, Any]]]:
+    """Return every entry where the query is a substring of the key or
+    name_cn, or the key is a substring of the query, in DB order.
+
+    Candidates come from the n-gram index instead of a scan over every food,
+    and are verified against the original containment rules.
+    """
+    candidates = _get_index(db).candidates(lower, db.get("foods", {}))
+    return [
+        (key, entry)
+        for key, entry in candidates
+        if lower in key or key in lower or lower in entry.get("name_cn", "")
+    ]
+
+
+# Approximate matching: minimum combined similarity for a match, how many
+# index candidates are scored per query, and the shortest query considered
+# (short words like "beer"/"beef" are too close to guess between).
+APPROX_THRESHOLD = 0.65
+APPROX_CANDIDATES = 50
+APPROX_MIN_LEN_LATIN = 5
+APPROX_MIN_LEN_CJK = 3
+
+
+def _approx_grams(text: str) -> list[str]:
+    """Grams used for similarity: bigrams for Latin text, characters for
+    Chinese (whose names are too short for bigrams to overlap on typos)."""
+    if text.isascii():
+        return sorted({text[i : i + 2] for i in range(len(text) - 1)} - {"  "})
+    return sorted(set(text) - {" "})
+
+
+def _edit_distance(a: str, b: str, bound: int) -> int:
+    """Levenshtein distance, or ``bound + 1`` as soon as it must exceed *bound*."""
+    if abs(len(a) - len(b)) > bound:
+        return bound + 1
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i] + [0] * len(b)
+        for j, cb in enumerate(b, 1):
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb))
+        if min(cur) > bound:
+            return bound + 1
+        prev = cur
+    return prev[-1]
+
+
+def _similarity(query: str, grams: list[str], target: str) -> float:
+    """Average of gram Dice coefficient and normalized edit similarity."""
+    if not target:
+        return 0.0
+    target_grams = set(_approx_grams(target))
+    if not grams or not target_grams:
+        return 0.0
+    dice = 2 * len(target_grams.intersection(grams)) / (len(grams) + len(target_grams))
+    longest = max(len(query), len(target))
+    bound = max(1, longest // 3)
+    dist = _edit_distance(query, target, bound)
+    edit = 1 - dist / longest if dist <= bound else 0.0
+    return (dice + edit) / 2
+
+
+def _approx_matches(
+    db: dict[str, Any],
+    query: str,
+    threshold: float = APPROX_THRESHOLD,
+    top_k: int = 5,
+) -> list[tuple[float, str, dict[str, Any]]]:
+    """Rank foods by similarity to *query* for typos and near-misses.
+
+    Candidates come from the n-gram index (see approx_candidates), and only
+    those are scored, so cost does not grow with the DB.  Latin queries are
+    compared with English keys, Chinese queries with name_cn.
+
+    Returns:
+        Up to *top_k* ``(score, key, entry)`` tuples at or above *threshold*,
+        best first.
+    """
+    lower = query.lower().strip()
+    latin = lower.isascii()
+    if len(lower) < (APPROX_MIN_LEN_LATIN if latin else APPROX_MIN_LEN_CJK):
+        return []
+    grams = _approx_grams(lower)
+    if len(grams) < 2:
+        return []
+
+    # Dice >= t needs at least t*|Q|/(2-t) shared grams.
+    min_overlap = max(1, int(threshold * len(grams) / (2 - threshold)))
+    candidates = _get_index(db).approx_candidates(
+        grams, min_overlap, db.get("foods", {}), APPROX_CANDIDATES
+    )
+
+    scored: list[tuple[float, str, dict[str, Any]]] = []
+    for key, entry in candidates:
+        target = key if latin else entry.get("name_cn", "")
+        score = _similarity(lower, grams, target)
+        if score >= threshold:
+            scored.append((round(score, 3), key, entry))
+
+    scored.sort(key=lambda c: (-c[0], len(c[1])))
+    return scored[:top_k]
+
+
 def _search_local(
     db: dict[str, Any], query: str
 ) -> tuple[str, dict[str, Any]] | None:
-    """Search local DB: exact match first, then fuzzy."""
+    """Search local DB: exact match first, then substring.
+
+    Approximate matches are deliberately not used here -- a near miss
+    ("green tea" -> green beans) would silently replace a correct API
+    answer.  They are only offered as suggestions (see cmd_search).
+    """
     result = _exact_match(db, query)
     if result:
         return result
@@ -803,56 +1563,208 @@ def _search_local(
 # Query parsing
 # ---------------------------------------------------------------------------
 
-# Patterns that capture an amount in grams and the food name.
-_AMOUNT_PATTERNS: list[re.Pattern[str]] = [
-    # "200g rice" or "200 g rice"
-    re.compile(r"(\d+(?:\.\d+)?)\s*g(?:rams?)?\s+(.+)", re.IGNORECASE),
-    # "rice 200g"
-    re.compile(r"(.+?)\s+(\d+(?:\.\d+)?)\s*g(?:rams?)?$", re.IGNORECASE),
-    # "200 grams of rice"
-    re.compile(
-        r"(\d+(?:\.\d+)?)\s*grams?\s+of\s+(.+)", re.IGNORECASE
-    ),
-]
+# Grams per unit, keyed by canonical unit with its spellings.  Volumes assume
+# water density; portion words use the typical servings from AGENT_GUIDE.md.
+_UNITS: dict[str, tuple[float, tuple[str, ...]]] = {
+    # ── Mass ────────────────────────────────────────────────────────────────
+    "g": (1.0, ("g", "gram", "grams", "gr", "克")),
+    "kg": (1000.0, ("kg", "kilogram", "kilograms", "千克", "公斤")),
+    "oz": (28.35, ("oz", "ounce", "ounces")),
+    "lb": (453.6, ("lb", "lbs", "pound", "pounds")),
+    "jin": (500.0, ("斤",)),
+    "liang": (50.0, ("两",)),
+    # ── Volume ──────────────────────────────────────────────────────────────
+    "ml": (1.0, ("ml", "milliliter", "milliliters", "millilitre", "millilitres", "毫升")),
+    "l": (1000.0, ("l", "liter", "liters", "litre", "litres", "升")),
+    "cup": (250.0, ("cup", "cups", "杯")),
+    "tbsp": (15.0, ("tbsp", "tablespoon", "tablespoons", "勺", "汤匙")),
+    "tsp": (5.0, ("tsp", "teaspoon", "teaspoons", "茶匙")),
+    # ── Portions ────────────────────────────────────────────────────────────
+    "bowl": (200.0, ("bowl", "bowls", "碗")),
+    "plate": (175.0, ("plate", "plates", "dish", "dishes", "盘", "碟")),
+    "serving": (150.0, ("serving", "servings", "portion", "portions", "份")),
+    "slice": (35.0, ("slice", "slices", "片")),
+    "piece": (100.0, ("piece", "pieces", "pc", "pcs", "个", "只", "根")),
+    "chunk": (50.0, ("chunk", "chunks", "块")),
+    "handful": (30.0, ("handful", "handfuls", "把")),
+}
+
+# Spelling -> grams, flattened once at import time.
+_UNIT_GRAMS: dict[str, float] = {
+    alias: grams for grams, aliases in _UNITS.values() for alias in aliases
+}
+
+# Size words scale the portion ("一大碗", "2 small bowls").
+_SIZE_FACTORS: dict[str, float] = {
+    "small": 0.75, "小": 0.75,
+    "medium": 1.0, "中": 1.0,
+    "large": 1.5, "big": 1.5, "大": 1.5,
+}
+
+_EN_NUMBERS: dict[str, float] = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10,
+    "half": 0.5, "half a": 0.5, "half an": 0.5,
+}
+
+_CN_DIGITS: dict[str, int] = {
+    "零": 0, "一": 1, "二": 2, "两": 2, "三": 3, "四": 4,
+    "五": 5, "六": 6, "七": 7, "八": 8, "九": 9,
+}
+
+# A bare count without a unit ("2 eggs") means pieces; larger bare numbers
+# ("200 rice") are read as grams.
+_MAX_BARE_COUNT = 20
+
+# Default serving when an item carries no amount at all.
+_DEFAULT_GRAMS = 100.0
+
+
+def _alternation(words: Any) -> str:
+    """Regex alternation, longest first so "kg" wins over "g"."""
+    return "|".join(re.escape(w) for w in sorted(words, key=len, reverse=True))
+
+
+def _en_words(words: Any) -> str:
+    """Alternation of ASCII words that must not run into further letters."""
+    return rf"(?:{_alternation(words)})(?![a-z])"
+
+
+_CJK_UNITS = [u for u in _UNIT_GRAMS if not u.isascii()]
+_ASCII_UNITS = [u for u in _UNIT_GRAMS if u.isascii()]
+_UNIT_RE = rf"(?:{_en_words(_ASCII_UNITS)}|{_alternation(_CJK_UNITS)})"
+_SIZE_RE = rf"(?:{_en_words(w for w in _SIZE_FACTORS if w.isascii())}|[小中大])"
+# "两" is only a numeral on its own; after another numeral it is the unit
+# (二两 = 2 × 50 g).
+_NUM_RE = (
+    r"(?:\d+(?:\.\d+)?(?:/\d+)?|[零一二三四五六七八九十百半]+|两|"
+    + _en_words(_EN_NUMBERS)
+    + ")"
+)
+# Numbers that also count without a unit ("2 eggs", "two eggs").  Chinese
+# numerals and the articles "a"/"an" start too many names (三文鱼, 五花肉,
+# "a la carte") to be read as a count unless a unit or size word follows.
+_BARE_NUM_RE = (
+    r"(?:\d+(?:\.\d+)?(?:/\d+)?|"
+    + _en_words(w for w in _EN_NUMBERS if w not in ("a", "an"))
+    + ")"
+)
+
+# One pattern covers every supported form: "200g rice", "2 bowls of rice",
+# "一大碗米饭", "rice 200g", "米饭两碗".  A trailing amount needs a unit and
+# is only tried where a number starts, never mid-number, which also keeps
+# long digit runs linear.  A leading amount needs a unit, or -- for digits
+# and English number words -- a size word, whitespace or (after a digit) a
+# CJK character, so names like "7up" or "vitamin b12" are left alone.
+_ITEM_RE = re.compile(
+    rf"""
+    ^\s*(?:
+        (?:
+            (?P<num>{_NUM_RE})\s*(?P<size>{_SIZE_RE})?\s*(?P<unit>{_UNIT_RE})
+          | (?P<bare_num>{_BARE_NUM_RE})
+            (?:\s*(?P<bare_size>{_SIZE_RE})\s+|\s+|(?<=\d)(?=[\u4e00-\u9fff]))
+          | (?P<art_num>an?)\s+(?P<art_size>{_en_words(w for w in _SIZE_FACTORS if w.isascii())})\s+
+        )
+        \s*(?:of\s+|的)?(?P<name>\S.*?)
+      |
+        (?P<tail_name>\S.*?)\s*
+        (?<![\d./零一二三四五六七八九十百半两])(?P<tail_num>{_NUM_RE})\s*(?P<tail_size>{_SIZE_RE})?\s*(?P<tail_unit>{_UNIT_RE})
+    )\s*$
+    """,
+    re.IGNORECASE | re.VERBOSE,
+)
+
+# Item separators: ASCII/Chinese commas, the Chinese enumeration comma and
+# semicolons.
+_SPLIT_RE = re.compile(r"[,，、;；]")
+
+
+def _cn_number(text: str) -> float | None:
+    """Convert a Chinese numeral (一, 两, 十二, 二十五, 半) to a number."""
+    if text == "半":
+        return 0.5
+    total, current = 0, 0
+    for ch in text:
+        if ch in _CN_DIGITS:
+            current = _CN_DIGITS[ch]
+        elif ch == "十":
+            total += (current or 1) * 10
+            current = 0
+        elif ch == "百":
+            total += (current or 1) * 100
+            current = 0
+        else:
+            return None
+    return float(total + current)
+
+
+def _to_number(text: str) -> float | None:
+    """Parse a numeric token: 1.5, 1/2, "two", "a", "一", "二十"."""
+    lower = text.lower()
+    if lower in _EN_NUMBERS:
+        return float(_EN_NUMBERS[lower])
+    if "/" in lower:
+        num, den = lower.split("/", 1)
+        return float(num) / float(den) if float(den) else None
+    try:
+        return float(lower)
+    except ValueError:
+        return _cn_number(text)
 
 
 def _parse_item(raw: str) -> tuple[str, float]:
     """Parse a single food item string into (food_name, grams).
 
-    Supports: "200g rice", "rice 200g", "200 grams rice", "rice" (default 100g).
+    Supports gram/kilogram/ounce/pound amounts, volumes (ml, cup, 杯, 勺),
+    portion words (bowl, 碗, 盘, 片, 个) with optional size words, English and
+    Chinese numerals, and amounts before or after the name: "200g rice",
+    "2 bowls of rice", "一大碗米饭", "1 cup milk", "米饭200克".  Items without an
+    amount default to 100 g.
 
     Returns:
         A tuple of (food_name_lowercase, serving_grams).
     """
-    text = raw.strip()
+    # Collapsing whitespace first keeps _ITEM_RE linear: a long run of spaces
+    # would otherwise be retried from every position of the lazy name.
+    text = " ".join(raw.split())
     if not text:
-        return ("", 100.0)
-
-    # Pattern 1 & 3: amount first
-    for pat in (_AMOUNT_PATTERNS[0], _AMOUNT_PATTERNS[2]):
-        m = pat.match(text)
-        if m:
-            return (m.group(2).strip().lower(), float(m.group(1)))
+        return ("", _DEFAULT_GRAMS)
 
-    # Pattern 2: amount last
-    m = _AMOUNT_PATTERNS[1].match(text)
+    m = _ITEM_RE.match(text)
     if m:
-        return (m.group(1).strip().lower(), float(m.group(2)))
+        if m.group("name") is not None:
+            name, unit = m.group("name", "unit")
+            num = m.group("num") or m.group("bare_num") or m.group("art_num")
+            size = m.group("size") or m.group("bare_size") or m.group("art_size")
+        else:
+            name, num, size, unit = m.group("tail_name", "tail_num", "tail_size", "tail_unit")
+        count = _to_number(num)
+        if count is not None:
+            if unit:
+                grams = count * _UNIT_GRAMS[unit.lower()]
+            elif count <= _MAX_BARE_COUNT:
+                grams = count * _UNIT_GRAMS["piece"]
+            else:
+                grams = count
+            if size:
+                grams *= _SIZE_FACTORS[size.lower()]
+            return (name.strip().lower(), round(grams, 1))
 
     # No amount found -- default to 100 g.
-    return (text.lower(), 100.0)
+    return (text.lower(), _DEFAULT_GRAMS)
 
 
 def _parse_query(query: str) -> list[tuple[str, float]]:
     """Split a comma-separated query and parse each item.
 
+    Splitting and the per-item match are single regex passes, so parsing is
+    linear in the length of the query.
+
     Returns:
         List of (food_name, grams) tuples.
     """
-    # Split on Chinese or ASCII comma.
-    parts = re.split(r"[,，]", query)
     items: list[tuple[str, float]] = []
-    for part in parts:
+    for part in _SPLIT_RE.split(query):
         name, grams = _parse_item(part)
         if name:
             items.append((name, grams))
@@ -873,50 +1785,399 @@ def _get_api_key() -> str | None:
     return key if key else "DEMO_KEY"
 
 
+def _api_max_workers() -> int:
+    """Upper bound on concurrent API requests (NANOBOTS_USDA_MAX_WORKERS)."""
+    try:
+        return max(1, int(os.environ.get("NANOBOTS_USDA_MAX_WORKERS", "4")))
+    except ValueError:
+        return 4
+
+
+def _new_session(pool_size: int | None = None) -> requests.Session:
+    """Create a pooled HTTP session sized for the API worker count."""
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    size = pool_size or _api_max_workers()
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=size))
+    return session
+
+
+class ApiCache:
+    """Persistent TTL cache of USDA search results, including "not found".
+
+    Entries are keyed by normalized query and dataType and hold the raw top
+    search hit, or None when the search came back empty.  Hit/miss counters
+    persist with the entries so ``stats`` can report hit rates over time.
+    Lookups may come from several worker threads; access is serialized.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.lock = threading.Lock()
+        self.dirty = False
+        try:
+            with open(path, "r", encoding="utf-8") as fh:
+                data = json.load(fh)
+        except (OSError, ValueError):
+            data = {}
+        self.entries: dict[str, dict[str, Any]] = data.get("entries", {})
+        self.counters: dict[str, int] = self._counters(data)
+        self.saved_counters = dict(self.counters)
+
+    @staticmethod
+    def _counters(data: dict[str, Any]) -> dict[str, int]:
+        return {
+            "hits": 0,
+            "negative_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            **data.get("counters", {}),
+        }
+
+    @staticmethod
+    def key(query: str, data_type: str | None) -> str:
+        """Normalize *query* (case, whitespace) into a cache key."""
+        return f"{data_type or '*'}|{' '.join(query.lower().split())}"
+
+    @staticmethod
+    def _fresh(entry: dict[str, Any], now: float) -> bool:
+        ttl = API_CACHE_TTL if entry.get("item") is not None else API_CACHE_NEGATIVE_TTL
+        return now - entry.get("at", 0) < ttl
+
+    def get(self, query: str, data_type: str | None) -> tuple[bool, dict[str, Any] | None]:
+        """Return ``(found, item)``; *item* is None for a cached "not found"."""
+        with self.lock:
+            self.dirty = True
+            entry = self.entries.get(self.key(query, data_type))
+            if entry is not None and self._fresh(entry, time.time()):
+                self.counters["hits"] += 1
+                if entry.get("item") is None:
+                    self.counters["negative_hits"] += 1
+                return True, entry.get("item")
+            self.counters["misses"] += 1
+            return False, None
+
+    def put(self, query: str, data_type: str | None, item: dict[str, Any] | None) -> None:
+        """Record an API outcome; pass None to remember an empty result."""
+        with self.lock:
+            self.entries[self.key(query, data_type)] = {"at": time.time(), "item": item}
+            self.dirty = True
+
+    def evict(self) -> None:
+        """Drop expired entries, then the oldest ones beyond the size cap."""
+        now = time.time()
+        live = {k: e for k, e in self.entries.items() if self._fresh(e, now)}
+        if len(live) > API_CACHE_MAX_ENTRIES:
+            newest = sorted(live.items(), key=lambda kv: kv[1].get("at", 0))
+            live = dict(newest[-API_CACHE_MAX_ENTRIES:])
+        evicted = len(self.entries) - len(live)
+        if evicted:
+            self.counters["evictions"] += evicted
+            self.entries = live
+            self.dirty = True
+
+    def save(self) -> None:
+        """Merge with the file on disk, evict and persist (best effort).
+
+        Other processes may have saved since this cache was loaded: the newer
+        of each entry wins and counter increments are added, not replaced.
+        """
+        with self.lock:
+            if not self.dirty:
+                return
+            try:
+                with _file_lock(self.path):
+                    try:
+                        with open(self.path, "r", encoding="utf-8") as fh:
+                            disk = json.load(fh)
+                    except (OSError, ValueError):
+                        disk = {}
+                    entries = disk.get("entries", {})
+                    for key, entry in self.entries.items():
+                        if entry.get("at", 0) >= entries.get(key, {}).get("at", 0):
+                            entries[key] = entry
+                    counters = self._counters(disk)
+                    for name, value in self.counters.items():
+                        counters[name] += value - self.saved_counters.get(name, 0)
+
+                    self.entries, self.counters = entries, counters
+                    self.evict()
+                    _write_json_atomic(
+                        self.path, {"entries": self.entries, "counters": self.counters}
+                    )
+                    self.saved_counters = dict(self.counters)
+                    self.dirty = False
+            except OSError:
+                pass
+
+    def summary(self) -> dict[str, Any]:
+        """Entry counts and hit/miss rates for the ``stats`` command."""
+        with self.lock:
+            lookups = self.counters["hits"] + self.counters["misses"]
+            negative = sum(1 for e in self.entries.values() if e.get("item") is None)
+            return {
+                "entries": len(self.entries),
+                "negative_entries": negative,
+                **self.counters,
+                "hit_rate": round(self.counters["hits"] / lookups, 3) if lookups else 0.0,
+            }
+
+
+_API_CACHE: ApiCache | None = None
+
+
+def _api_cache() -> ApiCache:
+    """Return the process-wide API cache, loading it on first use."""
+    global _API_CACHE
+    if _API_CACHE is None:
+        _API_CACHE = ApiCache(API_CACHE_PATH)
+    return _API_CACHE
+
+
+def _api_max_wait() -> float:
+    """Longest a single request may wait for quota (NANOBOTS_USDA_MAX_WAIT)."""
+    try:
+        return max(0.0, float(os.environ.get("NANOBOTS_USDA_MAX_WAIT", "20")))
+    except ValueError:
+        return 20.0
+
+
+class RateLimiter:
+    """Token bucket for the USDA API, shared by every nutrition.py process.
+
+    Bucket state lives in :data:`RATE_LIMIT_PATH` and is updated under a file
+    lock.  The bucket holds a small burst and refills at ``(limit - burst)``
+    per hour, so no rolling hour ever exceeds the tier's quota.  A 429 closes
+    the bucket for every process until its Retry-After has passed.
+    """
+
+    def __init__(self, tier: str, limit_per_hour: int) -> None:
+        self.tier = tier
+        self.burst = max(1, limit_per_hour // 3)
+        self.rate = max(limit_per_hour - self.burst, 1) / 3600.0
+
+    def _update(self, fn: Callable[[dict[str, Any], float], Any]) -> Any:
+        """Apply *fn* to this tier's refilled bucket state under the lock."""
+        with _file_lock(RATE_LIMIT_PATH):
+            try:
+                with open(RATE_LIMIT_PATH, "r", encoding="utf-8") as fh:
+                    data = json.load(fh)
+            except (OSError, ValueError):
+                data = {}
+            now = time.time()
+            state = data.get(self.tier) or {"tokens": self.burst, "updated": now}
+            elapsed = max(0.0, now - state.get("updated", now))
+            state["tokens"] = min(self.burst, state.get("tokens", 0) + elapsed * self.rate)
+            state["updated"] = now
+            result = fn(state, now)
+            data[self.tier] = state
+            _write_json_atomic(RATE_LIMIT_PATH, data)
+            return result
+
+    def acquire(self, max_wait: float) -> bool:
+        """Take one token, sleeping until it is available.
+
+        The token is reserved before sleeping, so concurrent callers queue
+        behind each other instead of racing for the same refill.
+
+        Returns:
+            False (without consuming anything) if the wait would exceed
+            *max_wait* seconds.
+        """
+
+        def take(state: dict[str, Any], now: float) -> float | None:
+            blocked = max(0.0, state.get("blocked_until", 0) - now)
+            wait = blocked + max(0.0, (1 - state["tokens"]) / self.rate)
+            if wait > max_wait:
+                return None
+            state["tokens"] -= 1
+            return wait
+
+        wait = self._update(take)
+        if wait is None:
+            return False
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+    def penalize(self, seconds: float) -> None:
+        """Hold the bucket closed for *seconds* after a 429."""
+
+        def block(state: dict[str, Any], now: float) -> None:
+            state["blocked_until"] = max(state.get("blocked_until", 0), now + seconds)
+
+        self._update(block)
+
+
+def _rate_limiter(api_key: str) -> RateLimiter:
+    """Return the limiter for *api_key*'s tier.
+
+    NANOBOTS_USDA_RATE_LIMIT (requests/hour) overrides the tier default.
+    """
+    tier = "demo" if api_key == "DEMO_KEY" else "registered"
+    try:
+        limit = int(os.environ.get("NANOBOTS_USDA_RATE_LIMIT", ""))
+    except ValueError:
+        limit = API_RATE_LIMITS[tier]
+    return RateLimiter(tier, limit)
+
+
+def _parse_retry_after(value: str | None) -> float | None:
+    """Parse a Retry-After header (delta-seconds or HTTP date) into seconds."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (when - datetime.now(when.tzinfo)).total_seconds())
+
+
+def _backoff_delay(attempt: int, retry_after: str | None) -> float:
+    """Delay before retry *attempt*: Retry-After if given, else full-jitter
+    exponential backoff."""
+    server = _parse_retry_after(retry_after)
+    if server is not None:
+        return server
+    return random.uniform(0, min(API_BACKOFF_CAP, API_BACKOFF_BASE * 2**attempt))
+
+
+def _api_search(
+    http: Any, params: dict[str, str]
+) -> list[dict[str, Any]] | None:
+    """Run one rate-limited search, retrying transient failures.
+
+    429s, 5xx responses, transport errors and malformed JSON are retried up
+    to API_MAX_RETRIES times with jittered exponential backoff, honouring
+    Retry-After.  Other HTTP errors (e.g. a rejected key) fail immediately.
+
+    Returns:
+        The ``foods`` list (possibly empty), or None if the search failed or
+        the quota cannot be had within NANOBOTS_USDA_MAX_WAIT seconds.
+    """
+    import requests
+
+    limiter = _rate_limiter(params["api_key"])
+    max_wait = _api_max_wait()
+
+    for attempt in range(API_MAX_RETRIES + 1):
+        if not limiter.acquire(max_wait):
+            return None
+
+        retry_after = None
+        try:
+            resp = http.get(API_SEARCH_URL, params=params, timeout=15)
+            if resp.status_code == 429 or resp.status_code >= 500:
+                retry_after = resp.headers.get("Retry-After")
+                if resp.status_code == 429:
+                    limiter.penalize(_backoff_delay(attempt, retry_after))
+            else:
+                resp.raise_for_status()
+                return resp.json().get("foods", [])
+        except requests.HTTPError:
+            return None
+        except (requests.RequestException, ValueError):
+            pass
+
+        if attempt == API_MAX_RETRIES:
+            break
+        delay = _backoff_delay(attempt, retry_after)
+        if delay > max_wait:
+            break
+        time.sleep(delay)
+
+    return None
+
+
 def _query_api(
-    food_name: str, grams: float, api_key: str
+    food_name: str,
+    grams: float,
+    api_key: str,
+    session: requests.Session | None = None,
 ) -> dict[str, Any] | None:
-    """Call the USDA FoodData Central search endpoint with one retry on failure.
+    """Call the USDA FoodData Central search endpoint.
+
+    Survey (FNDDS) foods are searched first, then all data types.  Network
+    calls go through the rate limiter and retry policy in _api_search.
+    Each (query, dataType) search is answered from the API cache when
+    possible; empty results are cached too, so unresolvable foods cost no
+    network calls until their entry expires.
 
     Args:
         food_name: The food to query (English).
         grams: Serving size in grams (not used in USDA query, kept for interface compat).
         api_key: The USDA API key (or DEMO_KEY).
+        session: Optional pooled session; a one-off request is made without it.
 
     Returns:
         A normalized dict with name/calories/protein/carbs/fat, or None on failure.
     """
-    url = "https://api.nal.usda.gov/fdc/v1/foods/search"
-    params = {
-        "api_key": api_key,
-        "query": food_name,
-        "pageSize": "3",
-        "dataType": "Survey (FNDDS)",
-    }
+    cache = _api_cache()
+    if session is None:
+        import requests
+
+        http: Any = requests
+    else:
+        http = session
+    for data_type in ("Survey (FNDDS)", None):
+        params = {"api_key": api_key, "query": food_name, "pageSize": "3"}
+        if data_type:
+            params["dataType"] = data_type
+
+        cached, item = cache.get(food_name, data_type)
+        if cached:
+            if item is not None:
+                return item
+            # Cached "not found": fall back to the next (broader) search.
+            continue
 
-    for attempt in range(2):  # one try + one retry
-        try:
-            resp = requests.get(url, params=params, timeout=15)
-            if resp.status_code == 429:
-                return None
-            resp.raise_for_status()
-            data = resp.json()
-            foods = data.get("foods", [])
-            if not foods:
-                # Retry without dataType filter (fall back to any type)
-                if attempt == 0:
-                    params.pop("dataType", None)
-                    continue
-                return None
-            return foods[0]
-        except (requests.RequestException, ValueError):
-            if attempt == 0:
-                continue
+        foods = _api_search(http, params)
+        if foods is None:
             return None
+        cache.put(food_name, data_type, foods[0] if foods else None)
+        if foods:
+            return foods[0]
 
     return None
 
 
+def _query_api_batch(
+    food_names: list[str],
+    api_key: str,
+    session: requests.Session | None = None,
+) -> dict[str, dict[str, Any] | None]:
+    """Query the API for every distinct name concurrently.
+
+    Requests fan out over a bounded thread pool sharing one pooled session,
+    so a meal with several misses costs roughly one round trip instead of
+    one per item.
+
+    Returns:
+        Mapping of food name to the raw API item (or None on failure).
+    """
+    unique = list(dict.fromkeys(food_names))
+    if not unique:
+        return {}
+
+    workers = min(_api_max_workers(), len(unique))
+    own_session = session is None
+    http = session or _new_session(workers)
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(lambda name: _query_api(name, 100.0, api_key, http), unique)
+            return dict(zip(unique, results))
+    finally:
+        _api_cache().save()
+        if own_session:
+            http.close()
+
+
 def _normalize_api_item(api_item: dict[str, Any]) -> dict[str, Any]:
     """Normalize a USDA FoodData Central response item to per-100g values.
 
@@ -943,7 +2204,10 @@ def _normalize_api_item(api_item: dict[str, Any]) -> dict[str, Any]:
 
 
 def _learn_food(db: dict[str, Any], key: str, per100: dict[str, Any]) -> None:
-    """Persist a newly-learned food into the database.
+    """Stage a newly-learned food in the database.
+
+    Nothing is written here; the caller persists all foods learned during a
+    lookup with a single :func:`_save_db`.
 
     Args:
         db: The in-memory database dict (mutated in place).
@@ -959,175 +2223,708 @@ def _learn_food(db: dict[str, Any], key: str, per100: dict[str, Any]) -> None:
         "source": "api",
         "added_at": _today(),
     }
-    _save_db(db)
+    _get_index(db).add(key, per100.get("name_cn", ""))
+    db.setdefault("_pending", set()).add(key)
 
 
 # ---------------------------------------------------------------------------
-# Commands
+# Offline USDA snapshot import
 # ---------------------------------------------------------------------------
 
+# FoodData Central nutrient ids -> our fields.  Foundation foods often carry
+# only the Atwater energy figures, used when plain Energy (kcal) is missing.
+FDC_NUTRIENTS: dict[int, str] = {
+    1008: "calories",
+    2047: "calories_atwater",
+    2048: "calories_atwater",
+    1003: "protein",
+    1005: "carbs",
+    1004: "fat",
+}
+
+# Data type spellings (CSV / JSON) -> (canonical name, priority).  When the
+# same description appears in several datasets the lowest priority wins.
+FDC_DATA_TYPES: dict[str, tuple[str, int]] = {
+    "foundation_food": ("foundation", 0),
+    "Foundation": ("foundation", 0),
+    "sr_legacy_food": ("sr_legacy", 1),
+    "SR Legacy": ("sr_legacy", 1),
+    "survey_fndds_food": ("survey", 2),
+    "Survey (FNDDS)": ("survey", 2),
+    "branded_food": ("branded", 3),
+    "Branded": ("branded", 3),
+}
+FDC_DEFAULT_TYPES = ("foundation", "sr_legacy", "survey")
+
+_IMPORT_BATCH = 10_000
+
+_FDC_STAGING = """
+CREATE TEMP TABLE IF NOT EXISTS fdc_food (
+    fdc_id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL,
+    priority INTEGER NOT NULL
+);
+CREATE TEMP TABLE IF NOT EXISTS fdc_nutrient (
+    fdc_id INTEGER NOT NULL,
+    field TEXT NOT NULL,
+    amount REAL NOT NULL
+);
+"""
+
+
+def _fdc_key(description: str) -> str:
+    """Normalize an FDC description into a food key."""
+    return " ".join(description.lower().split())
+
+
+def _iter_json_array(fh: IO[str], chunk_size: int = 1 << 20) -> Iterator[Any]:
+    """Yield the elements of the first JSON array in *fh* one at a time.
+
+    FDC JSON dumps are a single object wrapping one huge array
+    (``{"SurveyFoods": [...]}``); decoding element by element keeps memory
+    bounded by the largest single food rather than the whole file.
+    """
+    decoder = json.JSONDecoder()
+    buf = ""
+    eof = False
+
+    def fill() -> bool:
+        nonlocal buf, eof
+        data = fh.read(chunk_size)
+        if not data:
+            eof = True
+        buf += data
+        return bool(data)
+
+    while "[" not in buf:
+        if not fill():
+            return
+    buf = buf[buf.index("[") + 1 :]
+
+    while True:
+        stripped = buf.lstrip(" \t\r\n,")
+        if not stripped and not eof:
+            buf = ""
+            fill()
+            continue
+        buf = stripped
+        if not buf or buf[0] == "]":
+            return
+        try:
+            item, end = decoder.raw_decode(buf)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            fill()
+            continue
+        yield item
+        buf = buf[end:]
 
-def _scale(per100: dict[str, Any], grams: float) -> dict[str, float]:
-    """Scale per-100g values to the requested serving size.
+
+def _open_fdc_members(path: str) -> tuple[dict[str, Callable[[], IO[str]]], zipfile.ZipFile | None]:
+    """Locate food.csv / food_nutrient.csv / *.json in a directory, zip or file.
+
+    Returns:
+        Mapping of member kind (``food``, ``food_nutrient`` or ``json``) to
+        an opener, plus the zip handle to close afterwards (if any).
+    """
+    members: dict[str, Callable[[], IO[str]]] = {}
+
+    def kind(name: str) -> str | None:
+        base = os.path.basename(name)
+        if base in ("food.csv", "food_nutrient.csv"):
+            return base[:-4]
+        if base.endswith(".json"):
+            return "json"
+        return None
+
+    if zipfile.is_zipfile(path):
+        zf = zipfile.ZipFile(path)
+        for name in zf.namelist():
+            k = kind(name)
+            if k and k not in members:
+                members[k] = lambda n=name: io.TextIOWrapper(zf.open(n), encoding="utf-8", newline="")
+        return members, zf
+
+    if os.path.isdir(path):
+        for root, _dirs, files in os.walk(path):
+            for name in sorted(files):
+                k = kind(name)
+                if k and k not in members:
+                    full = os.path.join(root, name)
+                    members[k] = lambda f=full: open(f, "r", encoding="utf-8", newline="")
+        return members, None
+
+    k = kind(path)
+    if k:
+        members[k] = lambda: open(path, "r", encoding="utf-8", newline="")
+    return members, None
+
+
+def _stage_fdc_csv(
+    conn: sqlite3.Connection,
+    members: dict[str, Callable[[], IO[str]]],
+    priorities: dict[str, int],
+) -> int:
+    """Stream food.csv and food_nutrient.csv into the staging tables."""
+    scanned = 0
+    batch: list[tuple[Any, ...]] = []
+    with members["food"]() as fh:
+        for row in csv.DictReader(fh):
+            dtype = FDC_DATA_TYPES.get(row.get("data_type", ""))
+            if dtype is None or dtype[0] not in priorities or not row.get("description"):
+                continue
+            batch.append((int(row["fdc_id"]), _fdc_key(row["description"]), dtype[1]))
+            scanned += 1
+            if len(batch) >= _IMPORT_BATCH:
+                conn.executemany("INSERT OR IGNORE INTO fdc_food VALUES (?, ?, ?)", batch)
+                batch.clear()
+    conn.executemany("INSERT OR IGNORE INTO fdc_food VALUES (?, ?, ?)", batch)
+    batch.clear()
+
+    with members["food_nutrient"]() as fh:
+        for row in csv.DictReader(fh):
+            try:
+                field = FDC_NUTRIENTS.get(int(row["nutrient_id"]))
+                if field is None:
+                    continue
+                batch.append((int(row["fdc_id"]), field, float(row["amount"])))
+            except (KeyError, TypeError, ValueError):
+                continue
+            if len(batch) >= _IMPORT_BATCH:
+                conn.executemany("INSERT INTO fdc_nutrient VALUES (?, ?, ?)", batch)
+                batch.clear()
+    conn.executemany("INSERT INTO fdc_nutrient VALUES (?, ?, ?)", batch)
+    return scanned
+
+
+def _stage_fdc_json(
+    conn: sqlite3.Connection, opener: Callable[[], IO[str]], priorities: dict[str, int]
+) -> int:
+    """Stream the foods of an FDC JSON dump into the staging tables."""
+    scanned = 0
+    foods: list[tuple[Any, ...]] = []
+    nutrients: list[tuple[Any, ...]] = []
+    with opener() as fh:
+        for food in _iter_json_array(fh):
+            dtype = FDC_DATA_TYPES.get(food.get("dataType", ""))
+            if dtype is None or dtype[0] not in priorities or not food.get("description"):
+                continue
+            fdc_id = int(food["fdcId"])
+            foods.append((fdc_id, _fdc_key(food["description"]), dtype[1]))
+            for n in food.get("foodNutrients", []):
+                nutrient_id = (n.get("nutrient") or {}).get("id")
+                field = FDC_NUTRIENTS.get(nutrient_id) if nutrient_id else None
+                if field is not None and n.get("amount") is not None:
+                    nutrients.append((fdc_id, field, float(n["amount"])))
+            scanned += 1
+            if len(foods) >= _IMPORT_BATCH:
+                conn.executemany("INSERT OR IGNORE INTO fdc_food VALUES (?, ?, ?)", foods)
+                conn.executemany("INSERT INTO fdc_nutrient VALUES (?, ?, ?)", nutrients)
+                foods.clear()
+                nutrients.clear()
+    conn.executemany("INSERT OR IGNORE INTO fdc_food VALUES (?, ?, ?)", foods)
+    conn.executemany("INSERT INTO fdc_nutrient VALUES (?, ?, ?)", nutrients)
+    return scanned
+
+
+def cmd_import_fdc(path: str, data_types: Sequence[str] = FDC_DEFAULT_TYPES) -> dict[str, Any]:
+    """Import a FoodData Central bulk download into the SQLite food store.
+
+    Accepts the CSV download (directory or zip with food.csv and
+    food_nutrient.csv) or a JSON dump (file, directory or zip).  Rows are
+    streamed into temporary staging tables, so memory stays constant no
+    matter the dump size; one SQL pass then pivots the four macros per food
+    and inserts them.  Existing keys (builtin, learned or earlier imports)
+    are never overwritten.  The n-gram index for the new rows is built in
+    the same transaction.
+
+    Args:
+        path: Path to the downloaded dump.
+        data_types: Datasets to keep (foundation, sr_legacy, survey, branded).
 
     Returns:
-        Dict with calories, protein_g, carbs_g, fat_g for the given grams.
+        Result dict with scanned, imported and skipped counts.
+    """
+    if not os.path.exists(path):
+        return {"status": "error", "message": f"No such file or directory: {path}"}
+    priorities = {
+        name: prio for name, prio in FDC_DATA_TYPES.values() if name in set(data_types)
+    }
+    if not priorities:
+        return {"status": "error", "message": f"Unknown data types: {', '.join(data_types)}"}
+
+    members, zf = _open_fdc_members(path)
+    try:
+        if not ({"food", "food_nutrient"} <= members.keys() or "json" in members):
+            return {
+                "status": "error",
+                "message": "Expected food.csv + food_nutrient.csv or a .json dump",
+            }
+
+        # The compact store is required; migrate the JSON DB on first import.
+        migrated = None
+        if _backend() != "sqlite":
+            if os.environ.get("NANOBOTS_FOOD_DB_BACKEND", "").strip().lower() == "json":
+                return {"status": "error", "message": "Import needs the SQLite backend"}
+            if not os.path.exists(SQLITE_PATH):
+                migrated = _migrate_json_to_sqlite()
+        db = load_db()
+        conn: sqlite3.Connection = db["_conn"]
+
+        conn.execute("PRAGMA temp_store = FILE")
+        conn.executescript(_FDC_STAGING)
+        if {"food", "food_nutrient"} <= members.keys():
+            scanned = _stage_fdc_csv(conn, members, priorities)
+        else:
+            scanned = _stage_fdc_json(conn, members["json"], priorities)
+        conn.execute("CREATE INDEX IF NOT EXISTS temp.fdc_nutrient_id ON fdc_nutrient (fdc_id)")
+
+        last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM foods").fetchone()[0]
+        conn.execute(
+            """
+            INSERT OR IGNORE INTO foods
+                (key, name_cn, calories, protein, carbs, fat, source, added_at)
+            SELECT key, '', ROUND(COALESCE(kcal, atwater), 1), ROUND(protein, 1),
+                   ROUND(carbs, 1), ROUND(fat, 1), 'usda', ?
+            FROM (
+                SELECT f.fdc_id, f.key, f.priority,
+                       MAX(CASE WHEN n.field = 'calories' THEN n.amount END) AS kcal,
+                       MAX(CASE WHEN n.field = 'calories_atwater' THEN n.amount END) AS atwater,
+                       COALESCE(MAX(CASE WHEN n.field = 'protein' THEN n.amount END), 0) AS protein,
+                       COALESCE(MAX(CASE WHEN n.field = 'carbs' THEN n.amount END), 0) AS carbs,
+                       COALESCE(MAX(CASE WHEN n.field = 'fat' THEN n.amount END), 0) AS fat
+                FROM fdc_food f JOIN fdc_nutrient n ON n.fdc_id = f.fdc_id
+                GROUP BY f.fdc_id
+            )
+            WHERE COALESCE(kcal, atwater) IS NOT NULL
+            ORDER BY priority, fdc_id
+            """,
+            (_today(),),
+        )
+        imported = conn.execute("SELECT COUNT(*) FROM foods WHERE id > ?", (last_id,)).fetchone()[0]
+
+        SqliteIndex(conn).add_many(
+            conn.execute("SELECT id, key, name_cn FROM foods WHERE id > ?", (last_id,))
+        )
+        conn.executescript("DROP TABLE temp.fdc_food; DROP TABLE temp.fdc_nutrient;")
+        _save_db(db)
+    finally:
+        if zf is not None:
+            zf.close()
+
+    result: dict[str, Any] = {
+        "status": "ok",
+        "scanned": scanned,
+        "imported": imported,
+        "skipped": scanned - imported,
+        "db_stats": _db_stats(db),
+    }
+    if migrated is not None:
+        result["migrated"] = migrated
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Nutrient scaling
+# ---------------------------------------------------------------------------
+
+_MACRO_FIELDS = ("calories", "protein", "carbs", "fat")
+_SCALED_FIELDS = ("calories", "protein_g", "carbs_g", "fat_g")
+
+# Below this many items NumPy's import and call overhead outweighs the win.
+_NUMPY_MIN_BATCH = 64
+
+
+def _numpy() -> Any:
+    """Import NumPy on demand; None when it is not installed."""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+class MacroTable:
+    """Per-100g macros stored as one contiguous float array.
+
+    Row ``i`` holds calories, protein, carbs and fat of ``keys[i]`` at
+    offsets ``4*i .. 4*i+3``, so a batch of items is scaled by gathering rows
+    by id instead of building a dict per item.
     """
-    factor = grams / 100.0
+
+    def __init__(self) -> None:
+        self.keys: list[str] = []
+        self.ids: dict[str, int] = {}
+        self.values = array("d")
+
+    @classmethod
+    def from_foods(cls, foods: Any) -> MacroTable:
+        """Build a table over every ``(key, entry)`` in *foods*."""
+        table = cls()
+        for key, entry in foods.items():
+            table.add(key, entry)
+        return table
+
+    def add(self, key: str, per100: dict[str, Any]) -> int:
+        """Insert or overwrite *key*'s row and return its id."""
+        row = array("d", (float(per100.get(f, 0) or 0) for f in _MACRO_FIELDS))
+        food_id = self.ids.get(key)
+        if food_id is None:
+            food_id = len(self.keys)
+            self.keys.append(key)
+            self.ids[key] = food_id
+            self.values.extend(row)
+        else:
+            self.values[4 * food_id : 4 * food_id + 4] = row
+        return food_id
+
+    def scale(
+        self, ids: Sequence[int], grams: Sequence[float]
+    ) -> tuple[list[dict[str, float]], dict[str, float]]:
+        """Scale many servings in one pass.
+
+        Uses NumPy for large batches when it is installed, otherwise a plain
+        loop over the array.  Per-item values are rounded to 0.1 and totals
+        are the rounded sum of those, matching single-item lookups.
+
+        Args:
+            ids: Row id per item (see :meth:`add`).
+            grams: Serving size per item.
+
+        Returns:
+            ``(items, totals)`` keyed by calories/protein_g/carbs_g/fat_g.
+        """
+        np = _numpy() if len(ids) >= _NUMPY_MIN_BATCH else None
+        if np is not None:
+            per100 = np.frombuffer(self.values, dtype=np.float64).reshape(-1, 4)
+            factors = np.asarray(grams, dtype=np.float64) / 100.0
+            raw = per100[np.asarray(ids, dtype=np.intp)] * factors[:, None]
+            scaled = np.round(raw, 1)
+            # np.round is half-even on raw*10 while round() uses the exact
+            # decimal value; settle the rare near-ties the scalar way.
+            near_tie = np.abs(np.abs(raw * 10) % 1 - 0.5) < 1e-6
+            for i, j in zip(*np.nonzero(near_tie)):
+                scaled[i, j] = round(float(raw[i, j]), 1)
+            rows = scaled.tolist()
+            sums = np.round(scaled.sum(axis=0), 1).tolist()
+        else:
+            values = self.values
+            rows = []
+            sums = [0.0, 0.0, 0.0, 0.0]
+            for food_id, g in zip(ids, grams):
+                base = 4 * food_id
+                factor = g / 100.0
+                row = [round(values[base + j] * factor, 1) for j in range(4)]
+                rows.append(row)
+                for j in range(4):
+                    sums[j] += row[j]
+            sums = [round(v, 1) for v in sums]
+
+        items = [dict(zip(_SCALED_FIELDS, row)) for row in rows]
+        return items, dict(zip(_SCALED_FIELDS, sums))
+
+
+# ---------------------------------------------------------------------------
+# Commands
+# ---------------------------------------------------------------------------
+
+
+def _lookup_item(
+    name: str, name_cn: str, scaled: dict[str, float], grams: float, source: str
+) -> dict[str, Any]:
+    """Build one ``items`` entry of a lookup result."""
     return {
-        "calories": round(float(per100.get("calories", 0)) * factor, 1),
-        "protein_g": round(float(per100.get("protein", 0)) * factor, 1),
-        "carbs_g": round(float(per100.get("carbs", 0)) * factor, 1),
-        "fat_g": round(float(per100.get("fat", 0)) * factor, 1),
+        "name": name,
+        "name_cn": name_cn,
+        "calories": scaled["calories"],
+        "protein_g": scaled["protein_g"],
+        "carbs_g": scaled["carbs_g"],
+        "fat_g": scaled["fat_g"],
+        "serving_size_g": grams,
+        "source": source,
     }
 
 
-def cmd_lookup(query: str) -> dict[str, Any]:
+def cmd_lookup(
+    query: str,
+    session: requests.Session | None = None,
+    db: dict[str, Any] | None = None,
+    autosave: bool = True,
+    lock: threading.Lock | None = None,
+) -> dict[str, Any]:
     """Look up nutrition for a comma-separated list of foods with amounts.
 
+    Local hits are resolved first; all remaining misses are then sent to the
+    API together (see _query_api_batch).  Items keep their query order.
+
     Args:
         query: e.g. "200g rice, 150g chicken breast, 100g broccoli"
+        session: Optional pooled HTTP session to reuse across lookups.
+        db: Already-loaded database to reuse; loaded from disk when omitted.
+        autosave: Persist learned foods before returning.  Batch callers
+            pass False and save once themselves; db_stats is then omitted.
+        lock: Held around every access to *db* but released for the API
+            round trips, so a shared *db* can serve concurrent lookups.
 
     Returns:
         Result dict with items, totals, and db_stats.
     """
-    db = load_db()
+    if db is None:
+        db = load_db()
     items_parsed = _parse_query(query)
     if not items_parsed:
         return {"status": "error", "message": "No food items found in query."}
 
     api_key = _get_api_key()
-    result_items: list[dict[str, Any]] = []
-    totals = {"calories": 0.0, "protein_g": 0.0, "carbs_g": 0.0, "fat_g": 0.0}
-
-    for food_name, grams in items_parsed:
-        # --- Try local DB first ------------------------------------------------
-        local = _search_local(db, food_name)
-        if local is not None:
-            key, entry = local
-            scaled = _scale(entry, grams)
-            result_items.append(
-                {
-                    "name": key,
-                    "name_cn": entry.get("name_cn", ""),
-                    "calories": scaled["calories"],
-                    "protein_g": scaled["protein_g"],
-                    "carbs_g": scaled["carbs_g"],
-                    "fat_g": scaled["fat_g"],
+
+    guard = lock or nullcontext()
+
+    # --- Try local DB first ---------------------------------------------------
+    with guard:
+        local_hits = [_search_local(db, food_name) for food_name, _ in items_parsed]
+
+    # --- Resolve every miss against the API in one batch ----------------------
+    misses = [name for (name, _), hit in zip(items_parsed, local_hits) if hit is None]
+    api_items = _query_api_batch(misses, api_key, session) if api_key else {}
+
+    with guard:
+        learned: dict[str, tuple[str, dict[str, Any]]] = {}
+        for food_name, api_item in api_items.items():
+            if api_item is None:
+                continue
+            per100 = _normalize_api_item(api_item)
+            # Learn this food for future lookups.
+            learn_key = per100.get("name", food_name).lower().strip()
+            _learn_food(db, learn_key, per100)
+            learned[food_name] = (learn_key, per100)
+        if learned and autosave:
+            _save_db(db)
+
+        # --- Collect resolved rows, then scale them all in one pass ----------
+        table = MacroTable()
+        resolved: list[tuple[int, int, str, str, float, str]] = []
+        result_items: list[dict[str, Any] | None] = []
+
+        for (food_name, grams), local in zip(items_parsed, local_hits):
+            if local is not None:
+                key, entry = local
+                source = "local"
+            elif food_name in learned:
+                key, entry = learned[food_name]
+                source = "api"
+            else:
+                # --- Fallback: not found anywhere -----------------------------
+                fallback = {
+                    "name": food_name,
+                    "name_cn": "",
+                    "calories": 0,
+                    "protein_g": 0,
+                    "carbs_g": 0,
+                    "fat_g": 0,
                     "serving_size_g": grams,
-                    "source": "local",
+                    "source": "estimate",
+                    "message": (
+                        f"'{food_name}' not found in local DB and API lookup "
+                        "unavailable. Agent should estimate based on similar foods."
+                    ),
                 }
+                # Near misses (typos) are offered, never applied.
+                suggestions = _approx_matches(db, food_name, top_k=3)
+                if suggestions:
+                    fallback["suggestions"] = [
+                        {"name": key, "name_cn": entry.get("name_cn", ""), "score": score}
+                        for score, key, entry in suggestions
+                    ]
+                result_items.append(fallback)
+                continue
+
+            food_id = table.add(key, entry)
+            resolved.append(
+                (len(result_items), food_id, key, entry.get("name_cn", ""), grams, source)
             )
-            for k in totals:
-                totals[k] += scaled[k]
-            continue
+            result_items.append(None)
 
-        # --- Try API ----------------------------------------------------------
-        if api_key:
-            api_item = _query_api(food_name, grams, api_key)
-            if api_item is not None:
-                per100 = _normalize_api_item(api_item)
-                # Learn this food for future lookups.
-                learn_key = per100.get("name", food_name).lower().strip()
-                _learn_food(db, learn_key, per100)
-
-                scaled = _scale(per100, grams)
-                result_items.append(
-                    {
-                        "name": learn_key,
-                        "name_cn": per100.get("name_cn", ""),
-                        "calories": scaled["calories"],
-                        "protein_g": scaled["protein_g"],
-                        "carbs_g": scaled["carbs_g"],
-                        "fat_g": scaled["fat_g"],
-                        "serving_size_g": grams,
-                        "source": "api",
-                    }
-                )
-                for k in totals:
-                    totals[k] += scaled[k]
+        scaled, totals = table.scale(
+            [r[1] for r in resolved], [r[4] for r in resolved]
+        )
+        for (pos, _, key, name_cn, grams, source), values in zip(resolved, scaled):
+            result_items[pos] = _lookup_item(key, name_cn, values, grams, source)
+
+        result = {"status": "ok", "items": result_items, "totals": totals}
+        if autosave:
+            result["db_stats"] = _db_stats(db)
+        return result
+
+
+# Learned foods are flushed at least this often during a batch.
+_BATCH_SAVE_EVERY = 50
+
+
+def cmd_lookup_batch(stream: IO[str], out: IO[str]) -> dict[str, Any]:
+    """Run many lookups in one process, streaming JSON Lines.
+
+    Each input line is either a plain query string or a JSON object with
+    ``query`` and an optional ``id`` that is echoed back; any other JSON
+    value gets an error result for that line.  The DB,
+    its index and one HTTP session are set up once, and a result line is
+    written (and flushed) to *out* as soon as each query resolves.  Learned
+    foods are committed after each query on the SQLite backend (so no write
+    lock is held across API calls) and, for the JSON file, every
+    _BATCH_SAVE_EVERY queries and at the end.
+
+    Returns:
+        Summary dict with query/error counts and final db_stats.
+    """
+    db = load_db()
+    count = errors = 0
+    with _new_session() as session:
+        for line_no, line in enumerate(stream, 1):
+            line = line.strip()
+            if not line:
                 continue
 
-        # --- Fallback: not found anywhere -------------------------------------
-        result_items.append(
-            {
-                "name": food_name,
-                "name_cn": "",
-                "calories": 0,
-                "protein_g": 0,
-                "carbs_g": 0,
-                "fat_g": 0,
-                "serving_size_g": grams,
-                "source": "estimate",
-                "message": (
-                    f"'{food_name}' not found in local DB and API lookup "
-                    "unavailable. Agent should estimate based on similar foods."
-                ),
-            }
-        )
+            record_id = None
+            try:
+                query: Any = line
+                if line[0] in '{["':
+                    record = json.loads(line)
+                    if not isinstance(record, dict):
+                        raise ValueError('JSON input must be an object with a "query" field')
+                    record_id = record.get("id")
+                    query = record.get("query", "")
+                result = cmd_lookup(str(query), session=session, db=db, autosave=False)
+            except Exception as exc:
+                result = {"status": "error", "message": str(exc)}
+
+            count += 1
+            # SQLite holds its write lock from the first learned food until
+            # the commit, so commit after every query that learned something;
+            # only JSON rewrites are worth batching.
+            if db.get("_pending") and (
+                db.get("_backend") == "sqlite" or count % _BATCH_SAVE_EVERY == 0
+            ):
+                _save_db(db)
+
+            if result.get("status") != "ok":
+                errors += 1
+            head: dict[str, Any] = {"line": line_no}
+            if record_id is not None:
+                head["id"] = record_id
+            out.write(json.dumps({**head, **result}, ensure_ascii=False) + "\n")
+            out.flush()
+
+    if db.get("_pending"):
+        _save_db(db)
+    return {"status": "done", "queries": count, "errors": errors, "db_stats": _db_stats(db)}
+
+
+def cmd_rescale(items: list[dict[str, Any]]) -> dict[str, Any]:
+    """Recompute logged items against the current DB in one vectorized pass.
+
+    Meant for bulk corrections, e.g. re-deriving a month of meal logs after
+    a food's per-100g values were fixed.  Items are matched by exact
+    ``name`` key; unmatched items keep their stored values.
+
+    Args:
+        items: Item dicts as produced by ``lookup`` (name, serving_size_g, ...).
+
+    Returns:
+        Result dict with the updated items, totals and the number rescaled.
+    """
+    db = load_db()
+    foods = db.get("foods", {})
+    table = MacroTable()
+    ids: list[int] = []
+    grams: list[float] = []
+    positions: list[int] = []
+    untouched = {k: 0.0 for k in _SCALED_FIELDS}
+
+    for pos, item in enumerate(items):
+        key = str(item.get("name", "")).lower().strip()
+        entry = foods.get(key) if key else None
+        if entry is None:
+            for k in _SCALED_FIELDS:
+                untouched[k] += float(item.get(k, 0) or 0)
+            continue
+        ids.append(table.ids[key] if key in table.ids else table.add(key, entry))
+        grams.append(float(item.get("serving_size_g", 100)))
+        positions.append(pos)
 
-    # Round totals.
-    for k in totals:
-        totals[k] = round(totals[k], 1)
+    scaled, totals = table.scale(ids, grams)
+    updated = [dict(item) for item in items]
+    for pos, values in zip(positions, scaled):
+        updated[pos].update(values)
 
     return {
         "status": "ok",
-        "items": result_items,
-        "totals": totals,
-        "db_stats": _db_stats(db),
+        "count": len(updated),
+        "rescaled": len(positions),
+        "items": updated,
+        "totals": {k: round(totals[k] + untouched[k], 1) for k in _SCALED_FIELDS},
     }
 
 
-def cmd_search(query: str) -> dict[str, Any]:
+def cmd_search(query: str, db: dict[str, Any] | None = None) -> dict[str, Any]:
     """Search the local DB by English key or Chinese name (substring match).
 
+    When nothing contains the term, ranked approximate matches (typos,
+    near-synonyms) are returned instead, each with a ``score``.
+
     Args:
         query: Search term, e.g. "chicken" or "鸡胸肉".
 
     Returns:
         Result dict with matching entries (per-100g).
     """
-    db = load_db()
-    foods = db.get("foods", {})
-    lower = query.lower().strip()
+    if db is None:
+        db = load_db()
     matches: list[dict[str, Any]] = []
-
-    for key, entry in foods.items():
-        if lower in key or key in lower or lower in entry.get("name_cn", ""):
-            matches.append(
-                {
-                    "name": key,
-                    "name_cn": entry.get("name_cn", ""),
-                    "calories": entry.get("calories", 0),
-                    "protein_g": entry.get("protein", 0),
-                    "carbs_g": entry.get("carbs", 0),
-                    "fat_g": entry.get("fat", 0),
-                    "source": entry.get("source", "builtin"),
-                    "per_100g": True,
-                }
-            )
+    found: list[tuple[float | None, str, dict[str, Any]]] = [
+        (None, key, entry) for key, entry in _substring_matches(db, query.lower().strip())
+    ]
+    match_type = "substring"
+    if not found:
+        found = list(_approx_matches(db, query, top_k=10))
+        match_type = "approximate"
+
+    for score, key, entry in found:
+        match = {
+            "name": key,
+            "name_cn": entry.get("name_cn", ""),
+            "calories": entry.get("calories", 0),
+            "protein_g": entry.get("protein", 0),
+            "carbs_g": entry.get("carbs", 0),
+            "fat_g": entry.get("fat", 0),
+            "source": entry.get("source", "builtin"),
+            "per_100g": True,
+        }
+        if score is not None:
+            match["score"] = score
+        matches.append(match)
 
     return {
         "status": "ok",
         "query": query,
+        "match": match_type,
         "count": len(matches),
         "results": matches,
         "db_stats": _db_stats(db),
     }
 
 
-def cmd_list() -> dict[str, Any]:
+def cmd_list(db: dict[str, Any] | None = None) -> dict[str, Any]:
     """List all foods in the local database.
 
     Returns:
         Result dict with every food entry and its source.
     """
-    db = load_db()
+    if db is None:
+        db = load_db()
     foods = db.get("foods", {})
     entries: list[dict[str, Any]] = []
 
-    for key in sorted(foods.keys()):
-        entry = foods[key]
+    for key, entry in sorted(foods.items(), key=lambda kv: kv[0]):
         entries.append(
             {
                 "name": key,
@@ -1148,15 +2945,200 @@ def cmd_list() -> dict[str, Any]:
     }
 
 
-def cmd_stats() -> dict[str, Any]:
+def cmd_stats(db: dict[str, Any] | None = None) -> dict[str, Any]:
     """Show database statistics.
 
     Returns:
-        Result dict with counts of total, builtin, and learned foods.
+        Result dict with counts of total, builtin, and learned foods, plus
+        API cache entry counts and hit/miss rates.
     """
-    db = load_db()
+    if db is None:
+        db = load_db()
     stats = _db_stats(db)
-    return {"status": "ok", **stats}
+    return {
+        "status": "ok",
+        "backend": db.get("_backend", "json"),
+        **stats,
+        "api_cache": _api_cache().summary(),
+    }
+
+
+def cmd_migrate() -> dict[str, Any]:
+    """Migrate food-db.json into the SQLite store (one-shot).
+
+    Returns:
+        Result dict with the number of migrated foods and the JSON backup path.
+    """
+    if os.path.exists(SQLITE_PATH):
+        return {
+            "status": "error",
+            "message": f"SQLite store already exists at {SQLITE_PATH}",
+        }
+    summary = _migrate_json_to_sqlite()
+    return {"status": "ok", "backend": "sqlite", "path": SQLITE_PATH, **summary}
+
+
+# ---------------------------------------------------------------------------
+# Resident server
+# ---------------------------------------------------------------------------
+
+# Commands the resident server answers; everything else runs in-process.
+_SERVED_COMMANDS = ("lookup", "search", "list", "stats")
+
+# Generous enough for a lookup that waits on the API rate limiter.
+_SERVER_TIMEOUT = 120.0
+
+
+def _socket_path() -> str:
+    """Unix socket of the resident server (NANOBOTS_FOOD_SCOUT_SOCKET)."""
+    return os.environ.get("NANOBOTS_FOOD_SCOUT_SOCKET") or os.path.join(
+        DATA_DIR, "nutrition.sock"
+    )
+
+
+def _run_served(
+    command: str,
+    params: dict[str, Any],
+    db: dict[str, Any] | None = None,
+    session: requests.Session | None = None,
+) -> dict[str, Any]:
+    """Execute one of _SERVED_COMMANDS, in the server or in-process."""
+    match command:
+        case "lookup":
+            return cmd_lookup(str(params.get("query", "")), session=session, db=db)
+        case "search":
+            return cmd_search(str(params.get("query", "")), db=db)
+        case "list":
+            return cmd_list(db=db)
+        case "stats":
+            return cmd_stats(db=db)
+    return {"status": "error", "message": f"Unknown command: {command}"}
+
+
+def _call_server(
+    command: str, params: dict[str, Any], path: str | None = None
+) -> dict[str, Any] | None:
+    """Send a command to the resident server.
+
+    Returns:
+        The server's result, or None when no server is listening so the
+        caller can fall back to in-process execution.  Once connected, a
+        timeout or broken reply is reported as an error result instead:
+        the server may still be working on the request, and running it
+        again in-process would duplicate the API calls.
+    """
+    path = path or _socket_path()
+    if not hasattr(socket, "AF_UNIX") or not os.path.exists(path):
+        return None
+    request = json.dumps({"command": command, "params": params}, ensure_ascii=False)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(_SERVER_TIMEOUT)
+        try:
+            sock.connect(path)
+            sock.sendall(request.encode("utf-8") + b"\n")
+            with sock.makefile("rb") as fh:
+                line = fh.readline()
+            if line:
+                return json.loads(line)
+            message = "Server closed the connection without a reply"
+        except (FileNotFoundError, ConnectionRefusedError):
+            return None  # Stale socket file; nothing is listening.
+        except TimeoutError:
+            message = f"Server did not reply within {_SERVER_TIMEOUT:g}s"
+        except (OSError, ValueError) as exc:
+            message = f"Server request failed: {exc}"
+    return {"status": "error", "message": message}
+
+
+class _ServerState:
+    """Warm DB, index and HTTP pool shared by every server request.
+
+    Access to the DB is serialized with a lock, which lookups release while
+    they wait on the API.  Before each request the JSON DB is reloaded if
+    another process has rewritten it since it was loaded.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.db = load_db()
+        self.session = _new_session()
+        _api_cache()  # Load once here rather than racing in handler threads.
+
+    def handle(self, request: dict[str, Any]) -> dict[str, Any]:
+        command = request.get("command", "")
+        if command not in _SERVED_COMMANDS:
+            return {"status": "error", "message": f"Command not served: {command}"}
+        params = request.get("params") or {}
+        with self.lock:
+            if self.db.get("_backend") != "sqlite" and self.db.get("_signature") != _db_signature():
+                self.db = load_db()
+            db = self.db
+            if command != "lookup":
+                return _run_served(command, params, db, self.session)
+        return cmd_lookup(
+            str(params.get("query", "")), session=self.session, db=db, lock=self.lock
+        )
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """One JSON request line in, one JSON result line out."""
+
+    def handle(self) -> None:
+        try:
+            request = json.loads(self.rfile.readline())
+            result = self.server.state.handle(request)  # type: ignore[attr-defined]
+        except Exception as exc:
+            result = {"status": "error", "message": str(exc)}
+        self.wfile.write(json.dumps(result, ensure_ascii=False).encode("utf-8") + b"\n")
+
+
+def cmd_serve(socket_path: str | None = None) -> dict[str, Any]:
+    """Run the resident server until interrupted.
+
+    Keeps the DB, search index, API cache and HTTP pool warm and answers
+    lookup/search/list/stats over a Unix socket.  Other nutrition.py
+    invocations use it automatically while it is running.
+
+    Returns:
+        Result dict once the server has stopped (or could not start).
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        return {"status": "error", "message": "Unix sockets are not supported here"}
+
+    path = socket_path or _socket_path()
+    if os.path.exists(path):
+        if _call_server("stats", {}, path) is not None:
+            return {"status": "error", "message": f"Server already running on {path}"}
+        os.remove(path)  # Stale socket from a server that did not exit cleanly.
+
+    _ensure_data_dir()
+    # Bind with a restrictive umask so the socket is created 0600: only the
+    # owner may drive lookups that spend the API quota or write the DB.
+    old_umask = os.umask(0o177)
+    try:
+        server = socketserver.ThreadingUnixStreamServer(path, _RequestHandler)
+    finally:
+        os.umask(old_umask)
+    server.daemon_threads = True
+    server.state = _ServerState()  # type: ignore[attr-defined]
+
+    def _stop(_signum: int, _frame: Any) -> None:
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, _stop)
+    print(json.dumps({"status": "serving", "socket": path}), file=sys.stderr, flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        _api_cache().save()
+    return {"status": "ok", "message": "Server stopped"}
 
 
 # ---------------------------------------------------------------------------
@@ -1182,6 +3164,30 @@ def main() -> None:
         help="Comma-separated list of foods with optional amounts",
     )
 
+    # lookup-batch
+    p_batch = subparsers.add_parser(
+        "lookup-batch",
+        help="Look up many queries from stdin or a file, one JSON result per line",
+    )
+    p_batch.add_argument(
+        "--input",
+        type=str,
+        default="-",
+        help="File with one query (plain text or JSON object) per line; '-' for stdin",
+    )
+
+    # rescale
+    p_rescale = subparsers.add_parser(
+        "rescale",
+        help="Recompute logged items (JSON array) against the current DB",
+    )
+    p_rescale.add_argument(
+        "--items",
+        type=str,
+        default=None,
+        help="JSON array of items; read from stdin when omitted",
+    )
+
     # search
     p_search = subparsers.add_parser(
         "search",
@@ -1195,18 +3201,67 @@ def main() -> None:
     # stats
     subparsers.add_parser("stats", help="Show database statistics")
 
+    # migrate
+    subparsers.add_parser(
+        "migrate", help="Migrate food-db.json to the SQLite store"
+    )
+
+    # import-fdc
+    p_import = subparsers.add_parser(
+        "import-fdc",
+        help="Import a FoodData Central bulk download (CSV or JSON) into the SQLite store",
+    )
+    p_import.add_argument("path", type=str, help="Dump directory, zip or JSON file")
+    p_import.add_argument(
+        "--data-types",
+        type=str,
+        default=",".join(FDC_DEFAULT_TYPES),
+        help="Comma-separated datasets: foundation, sr_legacy, survey, branded",
+    )
+
+    # serve
+    p_serve = subparsers.add_parser(
+        "serve", help="Run the resident server on a Unix socket"
+    )
+    p_serve.add_argument(
+        "--socket",
+        type=str,
+        default=None,
+        help="Socket path (default: data/nutrition.sock or NANOBOTS_FOOD_SCOUT_SOCKET)",
+    )
+
     args = parser.parse_args()
 
+    if args.command == "lookup-batch":
+        # JSON Lines: results are streamed, the summary is the final line.
+        try:
+            if args.input == "-":
+                result = cmd_lookup_batch(sys.stdin, sys.stdout)
+            else:
+                with open(args.input, "r", encoding="utf-8") as fh:
+                    result = cmd_lookup_batch(fh, sys.stdout)
+        except Exception as exc:
+            result = {"status": "error", "message": str(exc)}
+        print(json.dumps(result, ensure_ascii=False))
+        return
+
     try:
         match args.command:
-            case "lookup":
-                result = cmd_lookup(args.query)
-            case "search":
-                result = cmd_search(args.query)
-            case "list":
-                result = cmd_list()
-            case "stats":
-                result = cmd_stats()
+            case "lookup" | "search" | "list" | "stats":
+                params = {"query": args.query} if "query" in args else {}
+                result = _call_server(args.command, params)
+                if result is None:
+                    result = _run_served(args.command, params)
+            case "rescale":
+                raw = args.items if args.items is not None else sys.stdin.read()
+                result = cmd_rescale(json.loads(raw))
+            case "migrate":
+                result = cmd_migrate()
+            case "import-fdc":
+                types = [t.strip() for t in args.data_types.split(",") if t.strip()]
+                result = cmd_import_fdc(args.path, types)
+            case "serve":
+                result = cmd_serve(args.socket)
             case _:
                 result = {"status": "error", "message": f"Unknown command: {args.command}"}
     except Exception as exc:
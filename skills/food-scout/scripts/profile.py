@@ -5,12 +5,27 @@
 # ///
 """食探 - 用户档案管理"""
 
+import argparse
+import hashlib
 import json
 import os
-import argparse
+import re
 from datetime import datetime
 
-DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+DATA_ROOT = os.environ.get('NANOBOTS_FOOD_SCOUT_DATA') or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+
+_TENANT_RE = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_.@-]{0,63}$')
+
+def _tenant_dir(user):
+    """用户数据目录（与 log.py 相同规则）；不指定用户时沿用单用户布局"""
+    if not user:
+        return DATA_ROOT
+    if not _TENANT_RE.match(user):
+        user = 'u-' + hashlib.sha256(user.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(DATA_ROOT, 'users', user)
+
+DATA_DIR = _tenant_dir(os.environ.get('NANOBOTS_FOOD_SCOUT_USER', ''))
 
 def get_profile_path():
     os.makedirs(DATA_DIR, exist_ok=True)
@@ -24,10 +39,29 @@ def load_profile():
     return {}
 
 def save_profile(profile):
+    # version 每次保存 +1，推算缓存（project）以它为键
+    profile['version'] = profile.get('version', 0) + 1
     path = get_profile_path()
     with open(path, 'w', encoding='utf-8') as f:
         json.dump(profile, f, ensure_ascii=False, indent=2)
 
+ACTIVITY_FACTORS = {
+    '久坐': 1.2,
+    '偶尔走动': 1.35,
+    '经常跑动': 1.5,
+}
+
+BRAIN_BONUS = {
+    '日常': 0,
+    '中度': 100,
+    '高强度': 250,
+}
+
+# 每公斤体重约对应 7700 千卡能量差
+KCAL_PER_KG = 7700
+
+PROJECTION_CACHE_MAX = 64
+
 def calc_bmr(height_cm, weight_kg, age, gender='female'):
     """Mifflin-St Jeor公式"""
     if gender == 'male':
@@ -45,20 +79,10 @@ def calc_expenditure(profile):
     bmr = calc_bmr(height, weight, age, gender)
 
     work_style = profile.get('work_style', '久坐')
-    activity_map = {
-        '久坐': 1.2,
-        '偶尔走动': 1.35,
-        '经常跑动': 1.5,
-    }
-    activity_factor = activity_map.get(work_style, 1.2)
+    activity_factor = ACTIVITY_FACTORS.get(work_style, 1.2)
 
     brain_load = profile.get('brain_load', '日常')
-    brain_map = {
-        '日常': 0,
-        '中度': 100,
-        '高强度': 250,
-    }
-    brain_bonus = brain_map.get(brain_load, 0)
+    brain_bonus = BRAIN_BONUS.get(brain_load, 0)
 
     tdee = bmr * activity_factor + brain_bonus
 
@@ -71,6 +95,118 @@ def calc_expenditure(profile):
         'brain_load': brain_load,
     }
 
+def _numpy():
+    """numpy 可选：装了就用，没装退回纯 Python，结果一致"""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+def _project(weight, tdee_slope, tdee_base, intake, days):
+    """体重轨迹 W(t) 的闭式解，对所有情景一次算完。
+
+    TDEE 随体重线性变化：TDEE(W) = slope·W + base，每天 W += (intake - TDEE(W)) / 7700。
+    这是一阶线性递推，W(t) = W* + (W0 - W*)·r^t，其中 W* = (intake - base) / slope，
+    r = 1 - slope / 7700，所以不用逐天循环。
+    返回 (每个情景在 days 各点的体重, 每个情景的平衡体重 W*)。
+    """
+    np = _numpy()
+    if np is not None:
+        slope = np.asarray(tdee_slope, dtype=float)[:, None]
+        base = np.asarray(tdee_base, dtype=float)[:, None]
+        target = (np.asarray(intake, dtype=float)[:, None] - base) / slope
+        r = 1 - slope / KCAL_PER_KG
+        t = np.asarray(days, dtype=float)[None, :]
+        weights = target + (weight - target) * r ** t
+        return weights.tolist(), target[:, 0].tolist()
+    targets = [(i - b) / a for a, b, i in zip(tdee_slope, tdee_base, intake)]
+    weights = [
+        [w_star + (weight - w_star) * (1 - a / KCAL_PER_KG) ** t for t in days]
+        for a, w_star in zip(tdee_slope, targets)
+    ]
+    return weights, targets
+
+def _scenario_key(days, step, scenarios):
+    raw = json.dumps([days, step, scenarios], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:16]
+
+def _projection_cache_path():
+    os.makedirs(DATA_DIR, exist_ok=True)
+    return os.path.join(DATA_DIR, 'projections.json')
+
+def project(profile, scenarios, days=90, step=7):
+    """推算各情景 N 天内的体重和能量收支轨迹。
+
+    scenarios: [{'intake': 千卡/天, 'work_style': ..., 'brain_load': ...}, ...]，
+    缺省字段沿用档案。结果按档案 version 缓存在 projections.json，档案一改就失效。
+    """
+    version = profile.get('version', 0)
+    key = _scenario_key(days, step, scenarios)
+    path = _projection_cache_path()
+    # 缓存文件损坏或被截断时当作空缓存，下面写回时覆盖
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        cache = {}
+    if (not isinstance(cache, dict) or cache.get('version') != version
+            or not isinstance(cache.get('entries'), dict)):
+        cache = {'version': version, 'entries': {}}
+    if key in cache['entries']:
+        return {**cache['entries'][key], 'cached': True}
+
+    height = profile.get('height_cm', 165)
+    weight = profile.get('weight_kg', 58)
+    age = profile.get('age', 30)
+    gender = profile.get('gender', 'female')
+    bmr_rest = calc_bmr(height, 0, age, gender)  # BMR 中与体重无关的部分
+
+    slopes, bases, intakes, resolved = [], [], [], []
+    for sc in scenarios:
+        work_style = sc.get('work_style') or profile.get('work_style', '久坐')
+        brain_load = sc.get('brain_load') or profile.get('brain_load', '日常')
+        factor = ACTIVITY_FACTORS.get(work_style, 1.2)
+        slopes.append(10 * factor)
+        bases.append(bmr_rest * factor + BRAIN_BONUS.get(brain_load, 0))
+        intakes.append(sc['intake'])
+        resolved.append((work_style, brain_load))
+
+    points = list(range(0, days + 1, step))
+    if points[-1] != days:
+        points.append(days)
+    trajectories, targets = _project(weight, slopes, bases, intakes, points)
+
+    results = []
+    for (work_style, brain_load), a, b, intake, traj, w_star in zip(
+            resolved, slopes, bases, intakes, trajectories, targets):
+        final = traj[-1]
+        results.append({
+            'work_style': work_style,
+            'brain_load': brain_load,
+            'intake': intake,
+            'start_tdee': round(a * weight + b),
+            'start_balance': round(intake - (a * weight + b)),
+            'final_weight_kg': round(final, 1),
+            'final_tdee': round(a * final + b),
+            'change_kg': round(final - weight, 1),
+            'equilibrium_weight_kg': round(w_star, 1),
+            'trajectory': [
+                {'day': t, 'weight_kg': round(w, 1), 'balance': round(intake - (a * w + b))}
+                for t, w in zip(points, traj)
+            ],
+        })
+
+    result = {'profile_version': version, 'days': days, 'start_weight_kg': weight, 'scenarios': results}
+    cache['entries'][key] = result
+    if len(cache['entries']) > PROJECTION_CACHE_MAX:
+        cache['entries'].pop(next(iter(cache['entries'])))
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    return {**result, 'cached': False}
+
 def cmd_init(args):
     profile = load_profile()
     profile['height_cm'] = args.height
@@ -143,6 +279,35 @@ def cmd_expenditure(args):
     }
     print(json.dumps(result, ensure_ascii=False, indent=2))
 
+def cmd_project(args):
+    profile = load_profile()
+    if not profile:
+        print(json.dumps({'status': 'error', 'message': '还没有档案'}, ensure_ascii=False))
+        return
+
+    if args.days < 1 or args.step < 1:
+        print(json.dumps({'status': 'error', 'message': '--days 和 --step 至少为 1'}, ensure_ascii=False))
+        return
+
+    tdee = calc_expenditure(profile)['tdee']
+    if args.intake:
+        try:
+            intakes = [float(x) for x in args.intake.split(',') if x.strip()]
+        except ValueError:
+            print(json.dumps({'status': 'error', 'message': f'--intake 须为逗号分隔的数字：{args.intake}'}, ensure_ascii=False))
+            return
+    else:
+        intakes = [tdee - 500, tdee - 250, tdee]
+    styles = [x.strip() for x in args.work_style.split(',') if x.strip()] if args.work_style else [None]
+    loads = [x.strip() for x in args.brain_load.split(',') if x.strip()] if args.brain_load else [None]
+    scenarios = [
+        {'intake': i, 'work_style': w, 'brain_load': b}
+        for w in styles for b in loads for i in intakes
+    ]
+
+    result = project(profile, scenarios, days=args.days, step=args.step)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
 def cmd_show(args):
     profile = load_profile()
     if not profile:
@@ -152,6 +317,7 @@ def cmd_show(args):
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='食探 - 用户档案')
+    parser.add_argument('--user', default=None, help='用户 ID（默认取 NANOBOTS_FOOD_SCOUT_USER）')
     sub = parser.add_subparsers(dest='cmd')
 
     p_init = sub.add_parser('init')
@@ -170,9 +336,18 @@ if __name__ == '__main__':
     p_update.add_argument('--gender', type=str)
 
     sub.add_parser('expenditure')
+
+    p_proj = sub.add_parser('project')
+    p_proj.add_argument('--days', type=int, default=90, help='推算天数')
+    p_proj.add_argument('--step', type=int, default=7, help='轨迹采样间隔(天)')
+    p_proj.add_argument('--intake', type=str, help='每日摄入(千卡)，逗号分隔多个情景；默认 TDEE-500/-250/±0')
+    p_proj.add_argument('--work-style', type=str, dest='work_style', help='逗号分隔，如 久坐,经常跑动')
+    p_proj.add_argument('--brain-load', type=str, dest='brain_load', help='逗号分隔，如 日常,高强度')
     sub.add_parser('show')
 
     args = parser.parse_args()
+    if args.user is not None:
+        DATA_DIR = _tenant_dir(args.user)
 
     if args.cmd == 'init':
         cmd_init(args)
@@ -180,6 +355,8 @@ if __name__ == '__main__':
         cmd_update(args)
     elif args.cmd == 'expenditure':
         cmd_expenditure(args)
+    elif args.cmd == 'project':
+        cmd_project(args)
     elif args.cmd == 'show':
         cmd_show(args)
     else:
@@ -0,0 +1,37 @@
+"""Regression tests for nutrition.py's query parser."""
+import importlib.util
+import time
+from pathlib import Path
+
+_SCRIPT = Path(__file__).resolve().parent.parent / "scripts" / "nutrition.py"
+_spec = importlib.util.spec_from_file_location("nutrition", _SCRIPT)
+nutrition = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(nutrition)
+
+
+def test_long_whitespace_run_parses_in_linear_time():
+    start = time.perf_counter()
+    assert nutrition._parse_query("x" + " " * 10_000 + "z") == [("x z", 100.0)]
+    assert nutrition._parse_query("rice" + " " * 10_000 + "200g") == [("rice", 200.0)]
+    assert time.perf_counter() - start < 1.0
+
+
+def test_long_numeral_run_parses_in_linear_time():
+    start = time.perf_counter()
+    nutrition._parse_query("一" * 20_000)
+    nutrition._parse_query("x" + "1" * 20_000)
+    assert time.perf_counter() - start < 1.0
+
+
+def test_amount_forms():
+    assert nutrition._parse_item("200g rice") == ("rice", 200.0)
+    assert nutrition._parse_item("rice 200g") == ("rice", 200.0)
+    assert nutrition._parse_item("一大碗米饭") == ("米饭", 300.0)
+    assert nutrition._parse_item("米饭两碗") == ("米饭", 400.0)
+    assert nutrition._parse_item("a cup of milk") == ("milk", 250.0)
+
+
+def test_leading_numeral_in_name_is_not_a_count():
+    assert nutrition._parse_item("三文鱼") == ("三文鱼", 100.0)
+    assert nutrition._parse_item("五花肉") == ("五花肉", 100.0)
+    assert nutrition._parse_item("a la carte salad") == ("a la carte salad", 100.0)